@@ -58,12 +58,13 @@ class Datasource:
                     Logger.debug("SERVER DISCONNECT")
 
     def handle_received_data(self, data):
+        # data is the already parsed JSON array of rows sent by the store
         # Update your UI or perform actions with received data here
         Logger.debug(f"Received data: {data}")
         processed_agent_data_list = sorted(
             [
                 ProcessedAgentData(**processed_data_json)
-                for processed_data_json in json.loads(data)
+                for processed_data_json in data
             ],
             key=lambda v: v.timestamp,
         )
@@ -1,8 +1,16 @@
 import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import paho.mqtt.client as mqtt
+from pydantic import ValidationError
 from app.interfaces.agent_gateway import AgentGateway
-from app.entities.agent_data import AgentData, GpsData
-from app.usecases.data_processing import process_agent_data
+from app.adapters.wire_format import decode_agent_samples, is_binary
+from app.entities.agent_data import agent_data_batch_adapter
+from app.usecases.data_processing import SAMPLE_COLUMNS, agent_data_to_samples, classify_road_state_codes
+from app.usecases.road_defect_detection import AgentRoadDefectDetectors
 from app.interfaces.hub_gateway import HubGateway
 
 
@@ -14,8 +22,18 @@ class AgentMQTTAdapter(AgentGateway):
         topic,
         hub_gateway: HubGateway,
         batch_size=10,
+        batch_max_latency=1.0,
+        defect_detectors: Optional[AgentRoadDefectDetectors] = None,
     ):
+        # Batching
         self.batch_size = batch_size
+        self.batch_max_latency = batch_max_latency
+        self._batch: List[Tuple[str, bytes]] = []
+        self._batch_deadline = None
+        self._batch_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._flush_thread = None
         # MQTT
         self.broker_host = broker_host
         self.broker_port = broker_port
@@ -23,6 +41,8 @@ class AgentMQTTAdapter(AgentGateway):
         self.client = mqtt.Client()
         # Hub
         self.hub_gateway = hub_gateway
+        # Per agent streaming classifier, agents are told apart by the MQTT topic
+        self.defect_detectors = defect_detectors
 
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
@@ -32,18 +52,88 @@ class AgentMQTTAdapter(AgentGateway):
             logging.info(f"Failed to connect to MQTT broker with code: {rc}")
 
     def on_message(self, client, userdata, msg):
-        """Processing agent data and sent it to hub gateway"""
+        """Buffer agent data until the batch is full or the max latency is reached"""
+        with self._batch_lock:
+            if not self._batch:
+                self._batch_deadline = time.monotonic() + self.batch_max_latency
+                # Wake up the flush thread so it waits for the new deadline
+                self._flush_event.set()
+            self._batch.append((msg.topic, msg.payload))
+            if len(self._batch) >= self.batch_size:
+                self._flush_event.set()
+
+    def flush(self):
+        """Processing buffered agent data and sent it to hub gateway as one batch"""
+        with self._batch_lock:
+            messages = self._batch
+            self._batch = []
+            self._batch_deadline = None
+        if not messages:
+            return
         try:
-            payload: str = msg.payload.decode("utf-8")
-            # Create AgentData instance with the received data
-            agent_data = AgentData.model_validate_json(payload, strict=True)
-            # Process the received data (you can call a use case here if needed)
-            processed_data = process_agent_data(agent_data)
-            # Store the agent_data in the database (you can send it to the data processing module)
-            if not self.hub_gateway.save_data(processed_data):
+            if self.defect_detectors is None:
+                # Classify the whole batch in one call
+                samples = self._parse_samples([payload for _, payload in messages])
+                codes = classify_road_state_codes(samples)
+            else:
+                agent_samples = []
+                agent_codes = []
+                for agent_id, payloads in self._group_by_agent(messages).items():
+                    samples = self._parse_samples(payloads)
+                    agent_samples.append(samples)
+                    agent_codes.append(self.defect_detectors.classify_samples(agent_id, samples))
+                samples = np.concatenate(agent_samples)
+                codes = np.concatenate(agent_codes)
+            if not samples.shape[0]:
+                return
+            # Send the batch to the hub with a single publish
+            if not self.hub_gateway.save_samples(samples, codes):
                 logging.error("Hub is not available")
         except Exception as e:
-            logging.info(f"Error processing MQTT message: {e}")
+            logging.info(f"Error processing MQTT batch: {e}")
+
+    @staticmethod
+    def _group_by_agent(messages: List[Tuple[str, bytes]]) -> Dict[str, List[bytes]]:
+        groups: Dict[str, List[bytes]] = {}
+        for topic, payload in messages:
+            groups.setdefault(topic, []).append(payload)
+        return groups
+
+    @staticmethod
+    def _parse_samples(payloads: List[bytes]) -> np.ndarray:
+        """
+        Decode payloads to one sample array. Single sample JSON messages are validated all at once,
+        binary and columnar messages are decoded straight to arrays without a model per sample.
+        Falls back to per message decoding to skip invalid ones.
+        """
+        if not any(is_binary(payload) or b'"offsets_ms"' in payload for payload in payloads):
+            try:
+                agent_data_batch = agent_data_batch_adapter.validate_json(
+                    b"[" + b",".join(payloads) + b"]", strict=True
+                )
+                if len(agent_data_batch) == len(payloads):
+                    return agent_data_to_samples(agent_data_batch)
+            except ValidationError:
+                pass
+        samples = [np.empty((0, SAMPLE_COLUMNS))]
+        for payload in payloads:
+            try:
+                samples.append(decode_agent_samples(payload))
+            except ValueError as e:
+                logging.info(f"Error processing MQTT message: {e}")
+        return np.concatenate(samples)
+
+    def _flush_loop(self):
+        while not self._stop_event.is_set():
+            with self._batch_lock:
+                deadline = self._batch_deadline
+                full = len(self._batch) >= self.batch_size
+            if full or (deadline is not None and time.monotonic() >= deadline):
+                self.flush()
+                continue
+            timeout = None if deadline is None else deadline - time.monotonic()
+            self._flush_event.wait(timeout)
+            self._flush_event.clear()
 
     def connect(self):
         self.client.on_connect = self.on_connect
@@ -51,26 +141,33 @@ class AgentMQTTAdapter(AgentGateway):
         self.client.connect(self.broker_host, self.broker_port, 60)
 
     def start(self):
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
         self.client.loop_start()
 
     def stop(self):
         self.client.loop_stop()
+        self._stop_event.set()
+        self._flush_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        # Send whatever is left in the buffer
+        self.flush()
 
 
 # Usage example:
 if __name__ == "__main__":
+    from app.adapters.hub_mqtt_adapter import HubMqttAdapter
+    from app.runtime import EdgeRuntime
+
     broker_host = "localhost"
     broker_port = 1883
     topic = "agent_data_topic"
-    # Assuming you have implemented the StoreGateway and passed it to the adapter
-    store_gateway = HubGateway()
-    adapter = AgentMQTTAdapter(broker_host, broker_port, topic, store_gateway)
-    adapter.connect()
-    adapter.start()
-    try:
-        # Keep the adapter running in the background
-        while True:
-            pass
-    except KeyboardInterrupt:
-        adapter.stop()
-        logging.info("Adapter stopped.")
+    hub_gateway = HubMqttAdapter(broker_host, broker_port, "processed_agent_data_topic")
+    adapter = AgentMQTTAdapter(broker_host, broker_port, topic, hub_gateway)
+    # Block without busy waiting until SIGTERM/SIGINT, then drain the buffered batch
+    runtime = EdgeRuntime(adapter)
+    runtime.add_shutdown_hook(hub_gateway.stop)
+    runtime.run()
@@ -0,0 +1,49 @@
+import gzip
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Every service is built from its own directory, so the edge and the hub keep identical copies of this
+# module (edge/app/adapters/http_session.py, hub/app/adapters/http_session.py), change both together.
+
+
+def create_http_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.2,
+    backoff_jitter: float = 0.2,
+) -> requests.Session:
+    """
+    Create a requests session that keeps connections alive in a pool shared by all threads.
+    Connection errors and 429/503 responses, which mean the request was not processed, are retried
+    with exponential backoff plus random jitter. Read errors are not retried, so a POST that may
+    have reached the server is never sent twice.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        other=0,
+        status_forcelist=(429, 503),
+        allowed_methods=None,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def encode_json_body(body: bytes, use_gzip: bool = False, min_gzip_size: int = 1024) -> Tuple[bytes, Dict[str, str]]:
+    """Return the request body and headers for a JSON payload, gzip compressed if enabled and worth it."""
+    headers = {"Content-Type": "application/json"}
+    if use_gzip and len(body) >= min_gzip_size:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
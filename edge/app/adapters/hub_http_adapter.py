@@ -1,14 +1,38 @@
 import logging
+from typing import List
 
-import requests as requests
+import numpy as np
 
-from app.entities.processed_agent_data import ProcessedAgentData
+from app.adapters.http_session import create_http_session, encode_json_body
+from app.entities.processed_agent_data import (
+    ProcessedAgentData,
+    processed_agent_data_batch_adapter,
+)
 from app.interfaces.hub_gateway import HubGateway
+from app.usecases.data_processing import samples_to_processed_agent_data
 
 
 class HubHttpAdapter(HubGateway):
-    def __init__(self, api_base_url):
+    def __init__(
+        self,
+        api_base_url,
+        pool_size=10,
+        timeout=(3.0, 30.0),
+        retries=3,
+        backoff_factor=0.2,
+        backoff_jitter=0.2,
+        use_gzip=False,
+    ):
         self.api_base_url = api_base_url
+        self.timeout = timeout
+        self.use_gzip = use_gzip
+        # Keep-alive connections reused for every request to the hub
+        self.session = create_http_session(
+            pool_size=pool_size,
+            retries=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+        )
 
     def save_data(self, processed_data: ProcessedAgentData):
         """
@@ -20,10 +44,54 @@ class HubHttpAdapter(HubGateway):
         """
         url = f"{self.api_base_url}/processed_agent_data/"
 
-        response = requests.post(url, data=processed_data.model_dump_json())
+        body, headers = encode_json_body(
+            processed_data.model_dump_json().encode("utf-8"), use_gzip=self.use_gzip
+        )
+        response = self.session.post(
+            url, data=body, headers=headers, timeout=self.timeout
+        )
         if response.status_code != 200:
             logging.info(
                 f"Invalid Hub response\nData: {processed_data.model_dump_json()}\nResponse: {response}"
             )
             return False
         return True
+
+    def save_data_batch(self, processed_data_batch: List[ProcessedAgentData]):
+        """
+        Save a batch of processed road data to the Hub with a single request.
+        Parameters:
+            processed_data_batch (List[ProcessedAgentData]): Processed road data to be saved.
+        Returns:
+            bool: True if the batch is successfully saved, False otherwise.
+        """
+        url = f"{self.api_base_url}/processed_agent_data/batch/"
+
+        body, headers = encode_json_body(
+            processed_agent_data_batch_adapter.dump_json(processed_data_batch),
+            use_gzip=self.use_gzip,
+        )
+        response = self.session.post(
+            url, data=body, headers=headers, timeout=self.timeout
+        )
+        if response.status_code != 200:
+            logging.info(
+                f"Invalid Hub response\nBatch size: {len(processed_data_batch)}\nResponse: {response}"
+            )
+            return False
+        return True
+
+    def save_samples(self, samples: np.ndarray, codes: np.ndarray):
+        """
+        Save classified samples to the Hub with a single request, as a batch of processed road data.
+        Parameters:
+            samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+            codes (np.ndarray): Road state codes of the samples.
+        Returns:
+            bool: True if the batch is successfully saved, False otherwise.
+        """
+        return self.save_data_batch(samples_to_processed_agent_data(samples, codes))
+
+    def stop(self):
+        """Close the pooled connections"""
+        self.session.close()
@@ -1,17 +1,25 @@
 import logging
+from typing import List
 
+import numpy as np
 import requests as requests
 from paho.mqtt import client as mqtt_client
 
-from app.entities.processed_agent_data import ProcessedAgentData
+from app.adapters.wire_format import encode_processed_agent_data_batch, encode_processed_samples
+from app.entities.processed_agent_data import (
+    ProcessedAgentData,
+    processed_agent_data_batch_adapter,
+)
 from app.interfaces.hub_gateway import HubGateway
+from app.usecases.data_processing import samples_to_processed_agent_data
 
 
 class HubMqttAdapter(HubGateway):
-    def __init__(self, broker, port, topic):
+    def __init__(self, broker, port, topic, wire_format="json"):
         self.broker = broker
         self.port = port
         self.topic = topic
+        self.wire_format = wire_format
         self.mqtt_client = self._connect_mqtt(broker, port)
 
     def save_data(self, processed_data: ProcessedAgentData):
@@ -22,7 +30,41 @@ class HubMqttAdapter(HubGateway):
         Returns:
             bool: True if the data is successfully saved, False otherwise.
         """
+        if self.wire_format == "binary":
+            return self.save_data_batch([processed_data])
         msg = processed_data.model_dump_json()
+        return self._publish(msg)
+
+    def save_data_batch(self, processed_data_batch: List[ProcessedAgentData]):
+        """
+        Save a batch of processed road data to the Hub as a single MQTT message, a JSON array
+        or a binary payload depending on the wire format.
+        Parameters:
+            processed_data_batch (List[ProcessedAgentData]): Processed road data to be saved.
+        Returns:
+            bool: True if the batch is successfully published, False otherwise.
+        """
+        if self.wire_format == "binary":
+            msg = encode_processed_agent_data_batch(processed_data_batch)
+        else:
+            msg = processed_agent_data_batch_adapter.dump_json(processed_data_batch)
+        return self._publish(msg)
+
+    def save_samples(self, samples: np.ndarray, codes: np.ndarray):
+        """
+        Save classified samples to the Hub as a single MQTT message, packed straight from the arrays
+        with the binary wire format, otherwise as processed road data.
+        Parameters:
+            samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+            codes (np.ndarray): Road state codes of the samples.
+        Returns:
+            bool: True if the batch is successfully published, False otherwise.
+        """
+        if self.wire_format == "binary":
+            return self._publish(encode_processed_samples(samples, codes))
+        return self.save_data_batch(samples_to_processed_agent_data(samples, codes))
+
+    def _publish(self, msg):
         result = self.mqtt_client.publish(self.topic, msg)
         status = result[0]
         if status == 0:
@@ -31,6 +73,11 @@ class HubMqttAdapter(HubGateway):
             print(f"Failed to send message to topic {self.topic}")
             return False
 
+    def stop(self):
+        """Disconnect from the broker once queued messages are sent"""
+        self.mqtt_client.disconnect()
+        self.mqtt_client.loop_stop()
+
     @staticmethod
     def _connect_mqtt(broker, port):
         """Create MQTT client"""
@@ -0,0 +1,124 @@
+import struct
+from typing import List
+
+import numpy as np
+from pydantic_core import from_json
+
+from app.entities.agent_data import AgentData, AgentDataBatch
+from app.entities.processed_agent_data import ProcessedAgentData
+from app.usecases.data_processing import (
+    LATITUDE,
+    LONGITUDE,
+    ROAD_STATES,
+    SAMPLE_COLUMNS,
+    TIMESTAMP,
+    X,
+    Y,
+    Z,
+    agent_data_batch_to_samples,
+    agent_data_to_samples,
+)
+
+# Binary payloads start with this header, JSON payloads start with "{" or "[" so they are told apart
+# by their first bytes: magic, format version, payload kind, number of samples N. The header is
+# followed by the columns x, y, z as float32[N], latitude, longitude and timestamp (POSIX seconds,
+# UTC) as float64[N] and, for processed agent data only, road state codes as uint8[N] indexing
+# ROAD_STATES.
+MAGIC = b"RV"
+VERSION = 1
+KIND_AGENT_DATA = 1
+KIND_PROCESSED_AGENT_DATA = 2
+HEADER = struct.Struct("<2sBBI")
+
+ROAD_STATE_CODES = {road_state: code for code, road_state in enumerate(ROAD_STATES.tolist())}
+ACCELEROMETER_DTYPE = np.dtype("<f4")
+COORDINATE_DTYPE = np.dtype("<f8")
+
+
+def is_binary(payload: bytes) -> bool:
+    return payload[:2] == MAGIC
+
+
+def payload_size(n: int, kind: int) -> int:
+    size = HEADER.size + n * (3 * ACCELEROMETER_DTYPE.itemsize + 3 * COORDINATE_DTYPE.itemsize)
+    return size + n if kind == KIND_PROCESSED_AGENT_DATA else size
+
+
+def decode_samples(payload: bytes, kind: int) -> np.ndarray:
+    """
+    Decode a binary payload to a sample array without building any model objects.
+    Parameters:
+        payload (bytes): Binary payload.
+        kind (int): Expected payload kind.
+    Returns:
+        samples (np.ndarray): float64 array of shape (N, 6) with columns x, y, z, lat, lon, ts,
+            for processed agent data with a 7th column holding the road state codes.
+    """
+    if len(payload) < HEADER.size:
+        raise ValueError("Binary payload is shorter than its header")
+    magic, version, payload_kind, n = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION or payload_kind != kind:
+        raise ValueError(f"Unsupported binary payload (version {version}, kind {payload_kind})")
+    if len(payload) != payload_size(n, kind):
+        raise ValueError(f"Binary payload of {len(payload)} bytes does not hold {n} samples")
+    columns = SAMPLE_COLUMNS + 1 if kind == KIND_PROCESSED_AGENT_DATA else SAMPLE_COLUMNS
+    samples = np.empty((n, columns), dtype=np.float64)
+    offset = HEADER.size
+    for column, dtype in ((X, ACCELEROMETER_DTYPE), (Y, ACCELEROMETER_DTYPE), (Z, ACCELEROMETER_DTYPE),
+                          (LATITUDE, COORDINATE_DTYPE), (LONGITUDE, COORDINATE_DTYPE),
+                          (TIMESTAMP, COORDINATE_DTYPE)):
+        samples[:, column] = np.frombuffer(payload, dtype=dtype, count=n, offset=offset)
+        offset += n * dtype.itemsize
+    if kind == KIND_PROCESSED_AGENT_DATA:
+        samples[:, SAMPLE_COLUMNS] = np.frombuffer(payload, dtype=np.uint8, count=n, offset=offset)
+    return samples
+
+
+def decode_agent_samples(payload: bytes) -> np.ndarray:
+    """
+    Decode an agent payload in any supported format to a sample array.
+    Parameters:
+        payload (bytes): A binary payload, a JSON AgentDataBatch or a JSON AgentData object.
+    Returns:
+        samples (np.ndarray): float64 array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+    """
+    if is_binary(payload):
+        return decode_samples(payload, KIND_AGENT_DATA)
+    data = from_json(payload)
+    if isinstance(data, dict) and "offsets_ms" in data:
+        return agent_data_batch_to_samples(AgentDataBatch.model_validate(data, strict=True))
+    return agent_data_to_samples([AgentData.model_validate(data, strict=True)])
+
+
+def encode_processed_samples(samples: np.ndarray, codes: np.ndarray) -> bytes:
+    """
+    Pack classified samples into one binary payload.
+    Parameters:
+        samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+        codes (np.ndarray): Road state codes of the samples.
+    Returns:
+        payload (bytes): Binary payload of kind KIND_PROCESSED_AGENT_DATA.
+    """
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, KIND_PROCESSED_AGENT_DATA, samples.shape[0]),
+        samples[:, [X, Y, Z]].T.astype(ACCELEROMETER_DTYPE).tobytes(),
+        samples[:, [LATITUDE, LONGITUDE, TIMESTAMP]].T.astype(COORDINATE_DTYPE).tobytes(),
+        np.asarray(codes, dtype=np.uint8).tobytes(),
+    ))
+
+
+def encode_processed_agent_data_batch(processed_data_batch: List[ProcessedAgentData]) -> bytes:
+    """
+    Pack processed agent data into one binary payload.
+    Parameters:
+        processed_data_batch (List[ProcessedAgentData]): Processed data with road states from ROAD_STATES.
+    Returns:
+        payload (bytes): Binary payload of kind KIND_PROCESSED_AGENT_DATA.
+    """
+    samples = agent_data_to_samples([processed_data.agent_data for processed_data in processed_data_batch])
+    codes = np.fromiter(
+        (ROAD_STATE_CODES[processed_data.road_state] for processed_data in processed_data_batch),
+        dtype=np.uint8,
+        count=len(processed_data_batch),
+    )
+    return encode_processed_samples(samples, codes)
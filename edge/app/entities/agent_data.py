@@ -1,5 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel, field_validator
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter, field_validator, model_validator
 
 
 class AccelerometerData(BaseModel):
@@ -29,3 +31,43 @@ class AgentData(BaseModel):
             raise ValueError(
                 "Invalid timestamp format. Expected ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)."
             )
+
+
+class GpsTrack(BaseModel):
+    # Milliseconds since the base timestamp of the batch
+    offsets_ms: List[int]
+    latitude: List[float]
+    longitude: List[float]
+
+
+class AgentDataBatch(BaseModel):
+    """
+    Columnar agent message with many accelerometer samples and a sparser GPS track,
+    validated as a whole without building an object per sample.
+    """
+
+    base_timestamp: datetime
+    # Milliseconds since base_timestamp, one per accelerometer sample
+    offsets_ms: List[int]
+    x: List[float]
+    y: List[float]
+    z: List[float]
+    gps: GpsTrack
+
+    @field_validator("base_timestamp", mode="before")
+    def parse_timestamp(cls, value):
+        return AgentData.parse_timestamp(value)
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.offsets_ms) == len(self.x) == len(self.y) == len(self.z):
+            raise ValueError("offsets_ms, x, y and z must have the same length")
+        if not self.gps.offsets_ms or not (
+            len(self.gps.offsets_ms) == len(self.gps.latitude) == len(self.gps.longitude)
+        ):
+            raise ValueError("gps must have at least one fix and offsets_ms, latitude and longitude of the same length")
+        return self
+
+
+# Validates a whole batch of agent messages in a single pydantic call
+agent_data_batch_adapter = TypeAdapter(List[AgentData])
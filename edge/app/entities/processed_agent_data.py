@@ -1,7 +1,13 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter
 from app.entities.agent_data import AgentData
 
 
 class ProcessedAgentData(BaseModel):
     road_state: str
     agent_data: AgentData
+
+
+# Validates and serializes a whole batch in a single pydantic call
+processed_agent_data_batch_adapter = TypeAdapter(List[ProcessedAgentData])
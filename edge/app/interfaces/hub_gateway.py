@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
 from app.entities.processed_agent_data import ProcessedAgentData
 
 
@@ -18,3 +22,33 @@ class HubGateway(ABC):
             bool: True if the data is successfully saved, False otherwise.
         """
         pass
+
+    @abstractmethod
+    def save_data_batch(self, processed_data_batch: List[ProcessedAgentData]) -> bool:
+        """
+        Method to save a batch of processed agent data with a single request to the hub.
+        Parameters:
+            processed_data_batch (List[ProcessedAgentData]): The processed agent data to be saved.
+        Returns:
+            bool: True if the batch is successfully saved, False otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def save_samples(self, samples: np.ndarray, codes: np.ndarray) -> bool:
+        """
+        Method to save classified samples with a single request to the hub.
+        Parameters:
+            samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+            codes (np.ndarray): Road state codes of the samples.
+        Returns:
+            bool: True if the batch is successfully saved, False otherwise.
+        """
+        pass
+
+    def stop(self):
+        """
+        Method to release the resources of the gateway, e.g. close connections.
+        Does nothing by default.
+        """
+        pass
@@ -0,0 +1,53 @@
+import logging
+import signal
+import threading
+from typing import Callable, List
+
+from app.interfaces.agent_gateway import AgentGateway
+
+
+class EdgeRuntime:
+    """
+    Runs an agent gateway until SIGTERM/SIGINT is received.
+    The main thread blocks on an Event, so waiting costs no CPU. On shutdown the gateway
+    is stopped first, which drains in-flight batches, then the shutdown hooks run.
+    """
+
+    def __init__(self, agent_gateway: AgentGateway):
+        self.agent_gateway = agent_gateway
+        self._stop_event = threading.Event()
+        self._startup_hooks: List[Callable[[], None]] = []
+        self._shutdown_hooks: List[Callable[[], None]] = []
+
+    def add_startup_hook(self, hook: Callable[[], None]):
+        """Register a callback to run before the agent gateway is started."""
+        self._startup_hooks.append(hook)
+
+    def add_shutdown_hook(self, hook: Callable[[], None]):
+        """Register a callback to run after the agent gateway is stopped."""
+        self._shutdown_hooks.append(hook)
+
+    def request_stop(self, *args):
+        """Ask the runtime to stop, safe to call from a signal handler or another thread."""
+        self._stop_event.set()
+
+    def run(self):
+        """Start the agent gateway and block until a stop is requested."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        for hook in self._startup_hooks:
+            hook()
+        # Connect to the MQTT broker and start listening for messages
+        self.agent_gateway.connect()
+        self.agent_gateway.start()
+        logging.info("System started.")
+        try:
+            self._stop_event.wait()
+        finally:
+            self.agent_gateway.stop()
+            for hook in reversed(self._shutdown_hooks):
+                try:
+                    hook()
+                except Exception as e:
+                    logging.error(f"Error in shutdown hook: {e}")
+            logging.info("System stopped.")
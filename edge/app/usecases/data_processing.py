@@ -1,5 +1,138 @@
-from app.entities.agent_data import AgentData
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+
+from app.entities.agent_data import AccelerometerData, AgentData, AgentDataBatch, GpsData
 from app.entities.processed_agent_data import ProcessedAgentData
+from config import ROAD_BUMP_THRESHOLD, ROAD_POTHOLE_THRESHOLD
+
+# Column layout of the sample arrays used by the batch classifier
+X, Y, Z, LATITUDE, LONGITUDE, TIMESTAMP = range(6)
+SAMPLE_COLUMNS = 6
+
+# Road states indexed by the codes returned from classify_road_state_codes
+ROAD_STATES = np.array(["smooth", "bump", "pothole"])
+SMOOTH, BUMP, POTHOLE = range(3)
+
+
+def agent_data_to_samples(agent_data_batch: List[AgentData]) -> np.ndarray:
+    """
+    Convert agent data to a columnar sample array.
+    Parameters:
+        agent_data_batch (List[AgentData]): Agent data items.
+    Returns:
+        samples (np.ndarray): float64 array of shape (N, 6) with columns x, y, z, lat, lon, ts
+            where ts is a POSIX timestamp in seconds (naive timestamps are treated as UTC).
+    """
+    samples = np.fromiter(
+        (
+            value
+            for agent_data in agent_data_batch
+            for value in (
+                agent_data.accelerometer.x,
+                agent_data.accelerometer.y,
+                agent_data.accelerometer.z,
+                agent_data.gps.latitude,
+                agent_data.gps.longitude,
+                agent_data.timestamp.replace(tzinfo=timezone.utc).timestamp(),
+            )
+        ),
+        dtype=np.float64,
+        count=len(agent_data_batch) * SAMPLE_COLUMNS,
+    )
+    return samples.reshape(-1, SAMPLE_COLUMNS)
+
+
+def agent_data_batch_to_samples(agent_data_batch: AgentDataBatch) -> np.ndarray:
+    """
+    Convert a columnar agent message to a sample array. The GPS track only has a fix where the
+    position changed, so every sample takes the last fix at or before it (samples before the first
+    fix take the first one), the same as the binary wire format that repeats the fix per sample.
+    Parameters:
+        agent_data_batch (AgentDataBatch): Columnar agent message.
+    Returns:
+        samples (np.ndarray): float64 array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+    """
+    n = len(agent_data_batch.offsets_ms)
+    samples = np.empty((n, SAMPLE_COLUMNS), dtype=np.float64)
+    samples[:, X] = agent_data_batch.x
+    samples[:, Y] = agent_data_batch.y
+    samples[:, Z] = agent_data_batch.z
+    offsets_ms = np.asarray(agent_data_batch.offsets_ms, dtype=np.float64)
+    gps_offsets_ms = np.asarray(agent_data_batch.gps.offsets_ms, dtype=np.float64)
+    order = np.argsort(gps_offsets_ms, kind="stable")
+    fixes = order[np.maximum(np.searchsorted(gps_offsets_ms[order], offsets_ms, side="right") - 1, 0)]
+    samples[:, LATITUDE] = np.asarray(agent_data_batch.gps.latitude, dtype=np.float64)[fixes]
+    samples[:, LONGITUDE] = np.asarray(agent_data_batch.gps.longitude, dtype=np.float64)[fixes]
+    base_timestamp = agent_data_batch.base_timestamp.replace(tzinfo=timezone.utc).timestamp()
+    samples[:, TIMESTAMP] = base_timestamp + offsets_ms / 1000.0
+    return samples
+
+
+def samples_to_agent_data(samples: np.ndarray) -> List[AgentData]:
+    """
+    Build agent data from a sample array, skipping validation since the values are typed already.
+    Parameters:
+        samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+    Returns:
+        agent_data_batch (List[AgentData]): Agent data with naive UTC timestamps.
+    """
+    return [
+        AgentData.model_construct(
+            accelerometer=AccelerometerData.model_construct(x=x, y=y, z=z),
+            gps=GpsData.model_construct(latitude=latitude, longitude=longitude),
+            timestamp=datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None),
+        )
+        for x, y, z, latitude, longitude, timestamp in samples[:, :SAMPLE_COLUMNS].tolist()
+    ]
+
+
+def samples_to_processed_agent_data(samples: np.ndarray, codes: np.ndarray) -> List[ProcessedAgentData]:
+    """
+    Build processed agent data from a sample array and its road state codes.
+    Parameters:
+        samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+        codes (np.ndarray): Array of shape (N,) with SMOOTH, BUMP or POTHOLE codes.
+    Returns:
+        processed_data_batch (List[ProcessedAgentData]): Processed data in the order of the samples.
+    """
+    return [
+        ProcessedAgentData.model_construct(road_state=road_state, agent_data=agent_data)
+        for road_state, agent_data in zip(ROAD_STATES[codes].tolist(), samples_to_agent_data(samples))
+    ]
+
+
+def classify_road_state_codes(
+    samples: np.ndarray,
+    bump_threshold: float = ROAD_BUMP_THRESHOLD,
+    pothole_threshold: float = ROAD_POTHOLE_THRESHOLD,
+) -> np.ndarray:
+    """
+    Classify the state of the road surface for every sample in one vectorized pass.
+    Parameters:
+        samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+        bump_threshold (float): y values above it are classified as a bump.
+        pothole_threshold (float): y values below it are classified as a pothole.
+    Returns:
+        codes (np.ndarray): uint8 array of shape (N,) with SMOOTH, BUMP or POTHOLE codes.
+    """
+    y = np.asarray(samples, dtype=np.float64)[:, Y]
+    codes = np.zeros(y.shape[0], dtype=np.uint8)
+    codes[y > bump_threshold] = BUMP
+    codes[y < pothole_threshold] = POTHOLE
+    return codes
+
+
+def classify_road_states(samples: np.ndarray, **thresholds) -> np.ndarray:
+    """
+    Classify the state of the road surface for every sample in one vectorized pass.
+    Parameters:
+        samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+    Returns:
+        road_states (np.ndarray): Array of shape (N,) with "bump", "pothole" or "smooth".
+    """
+    return ROAD_STATES[classify_road_state_codes(samples, **thresholds)]
 
 
 def process_agent_data(
@@ -12,11 +145,21 @@ def process_agent_data(
     Returns:
         processed_data_batch (ProcessedAgentData): Processed data containing the classified state of the road surface and agent data.
     """
-    if agent_data.accelerometer.y > 1500:
-        road_state = "bump"
-    elif agent_data.accelerometer.y < -1500:
-        road_state = "pothole"
-    else:
-        road_state = "smooth"
+    return process_agent_data_batch([agent_data])[0]
 
-    return ProcessedAgentData(road_state=road_state, agent_data=agent_data)
+
+def process_agent_data_batch(
+    agent_data_batch: List[AgentData],
+) -> List[ProcessedAgentData]:
+    """
+    Process a batch of agent data and classify the state of the road surface for each item.
+    Parameters:
+        agent_data_batch (List[AgentData]): Agent data items in the order they were received.
+    Returns:
+        processed_data_batch (List[ProcessedAgentData]): Processed data in the same order as the input.
+    """
+    road_states = classify_road_states(agent_data_to_samples(agent_data_batch))
+    return [
+        ProcessedAgentData(road_state=road_state, agent_data=agent_data)
+        for road_state, agent_data in zip(road_states.tolist(), agent_data_batch)
+    ]
@@ -0,0 +1,171 @@
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.usecases.data_processing import ROAD_STATES, Y
+from config import (
+    ROAD_BUMP_THRESHOLD,
+    ROAD_POTHOLE_THRESHOLD,
+    DETECTOR_WINDOW_SIZE,
+    DETECTOR_STD_FACTOR,
+    DETECTOR_MIN_SAMPLES,
+    DETECTOR_QUIET_SAMPLES,
+    DETECTOR_IDLE_TIMEOUT,
+)
+
+
+ROAD_STATE_CODES = {road_state: code for code, road_state in enumerate(ROAD_STATES.tolist())}
+
+
+class RoadDefectDetector:
+    """
+    Streaming road defect detector for a single agent.
+
+    Keeps a fixed-size ring buffer with the last normal y readings and their running
+    sum and sum of squares, so the rolling mean and variance are updated in O(1).
+    A sample is anomalous when its deviation from the rolling mean crosses the bump or
+    pothole threshold and exceeds std_factor standard deviations. A defect is reported
+    once, when min_samples anomalous samples are seen in a row, and the detector stays
+    inside the same defect until quiet_samples normal samples are seen again.
+    """
+
+    def __init__(
+        self,
+        window_size: int = DETECTOR_WINDOW_SIZE,
+        std_factor: float = DETECTOR_STD_FACTOR,
+        min_samples: int = DETECTOR_MIN_SAMPLES,
+        quiet_samples: int = DETECTOR_QUIET_SAMPLES,
+        bump_threshold: float = ROAD_BUMP_THRESHOLD,
+        pothole_threshold: float = ROAD_POTHOLE_THRESHOLD,
+    ):
+        self.window_size = window_size
+        self.std_factor = std_factor
+        self.min_samples = min_samples
+        self.quiet_samples = quiet_samples
+        self.bump_threshold = bump_threshold
+        self.pothole_threshold = pothole_threshold
+        # Ring buffer with the baseline readings
+        self._window = [0.0] * window_size
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        # Current defect state
+        self._run_length = 0
+        self._run_state = None
+        self._quiet_length = 0
+        self._in_defect = False
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    @property
+    def std(self) -> float:
+        if self._count < 2:
+            return 0.0
+        mean = self._sum / self._count
+        return math.sqrt(max(self._sum_sq / self._count - mean * mean, 0.0))
+
+    def update(self, y: float) -> str:
+        """
+        Feed the next accelerometer reading of the agent.
+        Parameters:
+            y (float): Accelerometer reading along the y axis.
+        Returns:
+            road_state (str): "bump" or "pothole" for the sample that confirms a new defect,
+                "smooth" for every other sample.
+        """
+        deviation = y - self.mean
+        significant = abs(deviation) > self.std_factor * self.std
+        if deviation > self.bump_threshold and significant:
+            state = "bump"
+        elif deviation < self.pothole_threshold and significant:
+            state = "pothole"
+        else:
+            state = None
+
+        if state is None:
+            self._push(y)
+            self._run_length = 0
+            self._quiet_length += 1
+            if self._quiet_length >= self.quiet_samples:
+                self._in_defect = False
+                self._run_state = None
+            return "smooth"
+
+        self._quiet_length = 0
+        if self._in_defect:
+            return "smooth"
+        if self._run_length == 0:
+            # The direction of the first excursion decides the type of the defect
+            self._run_state = state
+        self._run_length += 1
+        if self._run_length >= self.min_samples:
+            self._in_defect = True
+            self._run_length = 0
+            return self._run_state
+        return "smooth"
+
+    def _push(self, y: float):
+        if self._count == self.window_size:
+            old = self._window[self._index]
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self._count += 1
+        self._window[self._index] = y
+        self._index = (self._index + 1) % self.window_size
+        self._sum += y
+        self._sum_sq += y * y
+
+
+class AgentRoadDefectDetectors:
+    """
+    Keeps a RoadDefectDetector per agent and classifies agent data with it.
+    Detectors of agents that sent nothing for idle_timeout seconds are dropped, an agent
+    that comes back starts with a fresh baseline.
+    """
+
+    def __init__(self, idle_timeout: float = DETECTOR_IDLE_TIMEOUT, **detector_params):
+        self.idle_timeout = idle_timeout
+        self.detector_params = detector_params
+        # Agent id -> (detector, last seen), least recently seen first
+        self._detectors: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, agent_id: str) -> RoadDefectDetector:
+        now = time.monotonic()
+        entry = self._detectors.pop(agent_id, None)
+        detector = entry[0] if entry is not None else RoadDefectDetector(**self.detector_params)
+        self._detectors[agent_id] = (detector, now)
+        self._evict_idle(now)
+        return detector
+
+    def __len__(self) -> int:
+        return len(self._detectors)
+
+    def _evict_idle(self, now: float):
+        while self._detectors:
+            _, (_, last_seen) = next(iter(self._detectors.items()))
+            if now - last_seen < self.idle_timeout:
+                return
+            self._detectors.popitem(last=False)
+
+    def classify_samples(self, agent_id: str, samples: np.ndarray) -> np.ndarray:
+        """
+        Classify samples of one agent in the order they were taken.
+        Parameters:
+            agent_id (str): Identifier of the agent that sent the samples.
+            samples (np.ndarray): Array of shape (N, 6) with columns x, y, z, lat, lon, ts.
+        Returns:
+            codes (np.ndarray): uint8 array of shape (N,) with one BUMP or POTHOLE code per
+                detected defect and SMOOTH for every other sample.
+        """
+        update = self.get(agent_id).update
+        return np.fromiter(
+            (ROAD_STATE_CODES[update(y)] for y in samples[:, Y].tolist()),
+            dtype=np.uint8,
+            count=samples.shape[0],
+        )
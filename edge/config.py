@@ -8,11 +8,46 @@ def try_parse_int(value: str):
         return None
 
 
+def try_parse_float(value: str):
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
 # Configuration for agent MQTT
 MQTT_BROKER_HOST = os.environ.get("MQTT_BROKER_HOST") or "localhost"
 MQTT_BROKER_PORT = try_parse_int(os.environ.get("MQTT_BROKER_PORT")) or 1883
 MQTT_TOPIC = os.environ.get("MQTT_TOPIC") or "agent_data_topic"
 
+# Configuration for agent data batching
+BATCH_SIZE = try_parse_int(os.environ.get("BATCH_SIZE")) or 10
+# Max time in seconds a message may wait in a batch before it is flushed
+BATCH_MAX_LATENCY = try_parse_float(os.environ.get("BATCH_MAX_LATENCY")) or 1.0
+
+# Configuration for road state classification (accelerometer y axis)
+ROAD_BUMP_THRESHOLD = try_parse_float(os.environ.get("ROAD_BUMP_THRESHOLD")) or 1500.0
+ROAD_POTHOLE_THRESHOLD = try_parse_float(os.environ.get("ROAD_POTHOLE_THRESHOLD")) or -1500.0
+
+# Road state classifier: "streaming" (per agent defect detector) or "threshold" (per sample)
+ROAD_STATE_CLASSIFIER = os.environ.get("ROAD_STATE_CLASSIFIER") or "streaming"
+# Streaming defect detector: baseline window, noise gate and event hysteresis (in samples)
+DETECTOR_WINDOW_SIZE = try_parse_int(os.environ.get("DETECTOR_WINDOW_SIZE")) or 50
+DETECTOR_STD_FACTOR = try_parse_float(os.environ.get("DETECTOR_STD_FACTOR")) or 3.0
+DETECTOR_MIN_SAMPLES = try_parse_int(os.environ.get("DETECTOR_MIN_SAMPLES")) or 2
+DETECTOR_QUIET_SAMPLES = try_parse_int(os.environ.get("DETECTOR_QUIET_SAMPLES")) or 5
+# Seconds without data after which the detector state of an agent (MQTT topic) is dropped
+DETECTOR_IDLE_TIMEOUT = try_parse_float(os.environ.get("DETECTOR_IDLE_TIMEOUT")) or 600.0
+
+# HTTP client: connection pool, timeouts in seconds, retries with jittered backoff, gzip request bodies
+HTTP_POOL_SIZE = try_parse_int(os.environ.get("HTTP_POOL_SIZE")) or 10
+HTTP_CONNECT_TIMEOUT = try_parse_float(os.environ.get("HTTP_CONNECT_TIMEOUT")) or 3.0
+HTTP_READ_TIMEOUT = try_parse_float(os.environ.get("HTTP_READ_TIMEOUT")) or 30.0
+HTTP_RETRIES = try_parse_int(os.environ.get("HTTP_RETRIES")) or 3
+HTTP_BACKOFF_FACTOR = try_parse_float(os.environ.get("HTTP_BACKOFF_FACTOR")) or 0.2
+HTTP_BACKOFF_JITTER = try_parse_float(os.environ.get("HTTP_BACKOFF_JITTER")) or 0.2
+HTTP_GZIP = (os.environ.get("HTTP_GZIP") or "false").lower() in ("1", "true", "yes")
+
 # Configuration for hub MQTT
 HUB_MQTT_BROKER_HOST = os.environ.get("HUB_MQTT_BROKER_HOST") or "localhost"
 HUB_MQTT_BROKER_PORT = try_parse_int(os.environ.get("HUB_MQTT_BROKER_PORT")) or 1883
@@ -22,3 +57,7 @@ HUB_MQTT_TOPIC = os.environ.get("HUB_MQTT_TOPIC") or "processed_agent_data_topic
 HUB_HOST = os.environ.get("HUB_HOST") or "localhost"
 HUB_PORT = try_parse_int(os.environ.get("HUB_PORT")) or 12000
 HUB_URL = f"http://{HUB_HOST}:{HUB_PORT}"
+
+# Format of messages published to the hub over MQTT: "json" or "binary" (see app/adapters/wire_format.py).
+# Agent messages are accepted in both formats.
+WIRE_FORMAT = os.environ.get("WIRE_FORMAT") or "json"
@@ -2,14 +2,27 @@ import logging
 from app.adapters.agent_mqtt_adapter import AgentMQTTAdapter
 from app.adapters.hub_http_adapter import HubHttpAdapter
 from app.adapters.hub_mqtt_adapter import HubMqttAdapter
+from app.runtime import EdgeRuntime
+from app.usecases.road_defect_detection import AgentRoadDefectDetectors
 from config import (
     MQTT_BROKER_HOST,
     MQTT_BROKER_PORT,
     MQTT_TOPIC,
+    BATCH_SIZE,
+    BATCH_MAX_LATENCY,
+    ROAD_STATE_CLASSIFIER,
     HUB_URL,
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_JITTER,
+    HTTP_GZIP,
     HUB_MQTT_BROKER_HOST,
     HUB_MQTT_BROKER_PORT,
     HUB_MQTT_TOPIC,
+    WIRE_FORMAT,
 )
 
 if __name__ == "__main__":
@@ -25,11 +38,22 @@ if __name__ == "__main__":
     # Create an instance of the StoreApiAdapter using the configuration
     # hub_adapter = HubHttpAdapter(
     #     api_base_url=HUB_URL,
+    #     pool_size=HTTP_POOL_SIZE,
+    #     timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+    #     retries=HTTP_RETRIES,
+    #     backoff_factor=HTTP_BACKOFF_FACTOR,
+    #     backoff_jitter=HTTP_BACKOFF_JITTER,
+    #     use_gzip=HTTP_GZIP,
     # )
     hub_adapter = HubMqttAdapter(
         broker=HUB_MQTT_BROKER_HOST,
         port=HUB_MQTT_BROKER_PORT,
         topic=HUB_MQTT_TOPIC,
+        wire_format=WIRE_FORMAT,
+    )
+    # Use per agent streaming defect detectors unless the per sample classifier is configured
+    defect_detectors = (
+        AgentRoadDefectDetectors() if ROAD_STATE_CLASSIFIER == "streaming" else None
     )
     # Create an instance of the AgentMQTTAdapter using the configuration
     agent_adapter = AgentMQTTAdapter(
@@ -37,15 +61,11 @@ if __name__ == "__main__":
         broker_port=MQTT_BROKER_PORT,
         topic=MQTT_TOPIC,
         hub_gateway=hub_adapter,
+        batch_size=BATCH_SIZE,
+        batch_max_latency=BATCH_MAX_LATENCY,
+        defect_detectors=defect_detectors,
     )
-    try:
-        # Connect to the MQTT broker and start listening for messages
-        agent_adapter.connect()
-        agent_adapter.start()
-        # Keep the system running indefinitely (you can add other logic as needed)
-        while True:
-            pass
-    except KeyboardInterrupt:
-        # Stop the MQTT adapter and exit gracefully if interrupted by the user
-        agent_adapter.stop()
-        logging.info("System stopped.")
+    # Run until SIGTERM/SIGINT, then drain buffered batches and close the hub connection
+    runtime = EdgeRuntime(agent_adapter)
+    runtime.add_shutdown_hook(hub_adapter.stop)
+    runtime.run()
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.entities.agent_data import AgentDataBatch
+from app.usecases.data_processing import (
+    BUMP,
+    LATITUDE,
+    LONGITUDE,
+    POTHOLE,
+    SMOOTH,
+    TIMESTAMP,
+    X,
+    Y,
+    Z,
+    agent_data_batch_to_samples,
+    classify_road_state_codes,
+)
+
+
+def samples_with_y(*y):
+    samples = np.zeros((len(y), 6))
+    samples[:, Y] = y
+    return samples
+
+
+def make_batch(offsets_ms, gps_offsets_ms):
+    return AgentDataBatch(
+        base_timestamp=datetime(2024, 3, 1, 12, 0, 0),
+        offsets_ms=offsets_ms,
+        x=[float(i) for i in range(len(offsets_ms))],
+        y=[float(-i) for i in range(len(offsets_ms))],
+        z=[16516.0] * len(offsets_ms),
+        gps={
+            "offsets_ms": gps_offsets_ms,
+            "latitude": [50.0 + i for i in range(len(gps_offsets_ms))],
+            "longitude": [30.0 + i for i in range(len(gps_offsets_ms))],
+        },
+    )
+
+
+def test_classify_road_state_codes_uses_thresholds():
+    codes = classify_road_state_codes(samples_with_y(0, 101, 100, -100, -101), bump_threshold=100,
+                                      pothole_threshold=-100)
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [SMOOTH, BUMP, SMOOTH, SMOOTH, POTHOLE]
+
+
+def test_classify_road_state_codes_of_no_samples():
+    assert classify_road_state_codes(np.empty((0, 6))).shape == (0,)
+
+
+def test_agent_data_batch_to_samples_columns():
+    samples = agent_data_batch_to_samples(make_batch([0, 100, 250], [0]))
+    assert samples.shape == (3, 6)
+    assert samples[:, X].tolist() == [0.0, 1.0, 2.0]
+    assert samples[:, Y].tolist() == [0.0, -1.0, -2.0]
+    assert samples[:, Z].tolist() == [16516.0] * 3
+    base = datetime(2024, 3, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+    assert samples[:, TIMESTAMP].tolist() == [base, base + 0.1, base + 0.25]
+
+
+def test_agent_data_batch_to_samples_holds_the_last_gps_fix():
+    # Fixes at 100 and 300 ms: samples before the first fix take it, later ones the last fix at or before them
+    samples = agent_data_batch_to_samples(make_batch([0, 100, 200, 300, 400], [100, 300]))
+    assert samples[:, LATITUDE].tolist() == [50.0, 50.0, 50.0, 51.0, 51.0]
+    assert samples[:, LONGITUDE].tolist() == [30.0, 30.0, 30.0, 31.0, 31.0]
+
+
+def test_agent_data_batch_to_samples_sorts_gps_fixes():
+    samples = agent_data_batch_to_samples(make_batch([0, 150, 300], [200, 0]))
+    assert samples[:, LATITUDE].tolist() == [51.0, 51.0, 50.0]
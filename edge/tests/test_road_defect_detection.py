@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+
+from app.usecases.data_processing import BUMP, POTHOLE, SMOOTH, Y
+from app.usecases.road_defect_detection import AgentRoadDefectDetectors, RoadDefectDetector
+
+
+def make_detector(**params):
+    return RoadDefectDetector(**{
+        "window_size": 10, "std_factor": 3.0, "min_samples": 2, "quiet_samples": 3,
+        "bump_threshold": 100.0, "pothole_threshold": -100.0, **params,
+    })
+
+
+def feed(detector, values):
+    return [detector.update(y) for y in values]
+
+
+def test_rolling_mean_and_std_cover_the_window():
+    detector = make_detector(window_size=3)
+    feed(detector, [10.0, 20.0, 30.0, 40.0])
+    assert detector.mean == 30.0
+    assert abs(detector.std - np.std([20.0, 30.0, 40.0])) < 1e-9
+
+
+def test_defect_is_reported_once_after_min_samples():
+    detector = make_detector()
+    feed(detector, [0.0, 1.0, -1.0] * 3)
+    assert feed(detector, [500.0, 500.0, 500.0, 500.0]) == ["smooth", "bump", "smooth", "smooth"]
+
+
+def test_single_spike_is_not_a_defect():
+    detector = make_detector()
+    feed(detector, [0.0, 1.0, -1.0] * 3)
+    assert feed(detector, [500.0, 0.0, -500.0, 0.0]) == ["smooth"] * 4
+
+
+def test_first_excursion_decides_the_defect_type():
+    detector = make_detector()
+    feed(detector, [0.0, 1.0, -1.0] * 3)
+    assert feed(detector, [-500.0, 500.0]) == ["smooth", "pothole"]
+
+
+def test_next_defect_needs_quiet_samples_in_between():
+    detector = make_detector()
+    feed(detector, [0.0, 1.0, -1.0] * 3)
+    feed(detector, [500.0, 500.0])
+    # Fewer normal samples than quiet_samples keep the detector inside the same defect
+    assert feed(detector, [0.0, 0.0, 500.0, 500.0]) == ["smooth"] * 4
+    assert feed(detector, [0.0, 0.0, 0.0, -500.0, -500.0]) == ["smooth"] * 4 + ["pothole"]
+
+
+def test_anomalies_do_not_enter_the_baseline():
+    detector = make_detector()
+    feed(detector, [0.0] * 10)
+    feed(detector, [500.0, 500.0])
+    assert detector.mean == 0.0
+
+
+def test_agent_detectors_are_kept_per_agent():
+    detectors = AgentRoadDefectDetectors(idle_timeout=60.0, window_size=10, min_samples=2, quiet_samples=3,
+                                         bump_threshold=100.0, pothole_threshold=-100.0)
+    samples = np.zeros((12, 6))
+    samples[10:, Y] = 500.0
+    assert detectors.classify_samples("a", samples).tolist() == [SMOOTH] * 11 + [BUMP]
+    # Agent b has a detector of its own, which is not inside the bump of agent a
+    assert detectors.classify_samples("b", samples[10:]).tolist() == [SMOOTH, BUMP]
+    # Agent a goes on where it stopped: quiet samples end its bump, then a pothole follows
+    samples[:, Y] = [0.0] * 3 + [-500.0] * 2 + [0.0] * 7
+    assert detectors.classify_samples("a", samples[:5]).tolist() == [SMOOTH] * 4 + [POTHOLE]
+    assert len(detectors) == 2
+
+
+def test_idle_agent_detectors_are_evicted():
+    detectors = AgentRoadDefectDetectors(idle_timeout=0.01)
+    detectors.get("a")
+    time.sleep(0.02)
+    detectors.get("b")
+    assert len(detectors) == 1
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.adapters.wire_format import (
+    HEADER,
+    KIND_AGENT_DATA,
+    KIND_PROCESSED_AGENT_DATA,
+    MAGIC,
+    VERSION,
+    decode_agent_samples,
+    decode_samples,
+    encode_processed_agent_data_batch,
+    encode_processed_samples,
+)
+from app.entities.processed_agent_data import ProcessedAgentData
+from app.usecases.data_processing import BUMP, POTHOLE, SAMPLE_COLUMNS, SMOOTH, agent_data_to_samples
+
+TIMESTAMP = datetime(2024, 3, 1, 12, 0, 0).timestamp()
+
+
+def make_samples(n):
+    samples = np.empty((n, SAMPLE_COLUMNS))
+    samples[:, 0] = np.arange(n) - 17.0
+    samples[:, 1] = 4.5 - np.arange(n)
+    samples[:, 2] = 16516.0
+    samples[:, 3] = 50.450386085935094 + np.arange(n) * 1e-6
+    samples[:, 4] = 30.524547100067142
+    samples[:, 5] = TIMESTAMP + np.arange(n) * 0.1
+    return samples
+
+
+def encode_agent_samples(samples):
+    """Agent payload as the fake agent packs it."""
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, KIND_AGENT_DATA, samples.shape[0]),
+        samples[:, :3].T.astype("<f4").tobytes(),
+        samples[:, 3:].T.astype("<f8").tobytes(),
+    ))
+
+
+def test_processed_samples_round_trip():
+    samples = make_samples(5)
+    codes = np.array([SMOOTH, BUMP, POTHOLE, SMOOTH, BUMP], dtype=np.uint8)
+    decoded = decode_samples(encode_processed_samples(samples, codes), KIND_PROCESSED_AGENT_DATA)
+    assert decoded.shape == (5, SAMPLE_COLUMNS + 1)
+    # Accelerometer values are float32 on the wire, coordinates and timestamps keep full precision
+    np.testing.assert_array_equal(decoded[:, :3], samples[:, :3].astype(np.float32))
+    np.testing.assert_array_equal(decoded[:, 3:SAMPLE_COLUMNS], samples[:, 3:])
+    assert decoded[:, SAMPLE_COLUMNS].tolist() == codes.tolist()
+
+
+def test_processed_agent_data_batch_round_trip():
+    batch = [
+        ProcessedAgentData.model_validate({
+            "road_state": road_state,
+            "agent_data": {
+                "accelerometer": {"x": 1.0, "y": -2.5, "z": 3.0},
+                "gps": {"latitude": 50.45, "longitude": 30.52},
+                "timestamp": "2024-03-01T12:00:00.250000",
+            },
+        })
+        for road_state in ("smooth", "bump", "pothole")
+    ]
+    decoded = decode_samples(encode_processed_agent_data_batch(batch), KIND_PROCESSED_AGENT_DATA)
+    np.testing.assert_array_equal(decoded[:, :SAMPLE_COLUMNS],
+                                  agent_data_to_samples([data.agent_data for data in batch]))
+    assert decoded[:, SAMPLE_COLUMNS].tolist() == [SMOOTH, BUMP, POTHOLE]
+
+
+def test_decode_agent_samples_of_binary_payload():
+    samples = make_samples(3)
+    np.testing.assert_array_equal(decode_agent_samples(encode_agent_samples(samples)), samples)
+
+
+def test_decode_agent_samples_of_json_payload():
+    payload = (b'{"accelerometer": {"x": 1.0, "y": 2.0, "z": 3.0}, "gps": {"latitude": 50.0, "longitude": 30.0},'
+               b' "timestamp": "2024-03-01T12:00:00"}')
+    assert decode_agent_samples(payload).tolist() == [[1.0, 2.0, 3.0, 50.0, 30.0, 1709294400.0]]
+
+
+@pytest.mark.parametrize("payload", [
+    MAGIC,
+    HEADER.pack(MAGIC, VERSION + 1, KIND_AGENT_DATA, 0),
+    HEADER.pack(MAGIC, VERSION, KIND_PROCESSED_AGENT_DATA, 0),
+    encode_agent_samples(make_samples(2))[:-1],
+    HEADER.pack(MAGIC, VERSION, KIND_AGENT_DATA, 2 ** 32 - 1),
+])
+def test_decode_rejects_malformed_payloads(payload):
+    with pytest.raises(ValueError):
+        decode_samples(payload, KIND_AGENT_DATA)
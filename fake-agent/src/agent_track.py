@@ -0,0 +1,160 @@
+import csv
+import mmap
+import sys
+from array import array
+from datetime import datetime
+from typing import Optional, Sequence
+
+from domain.accelerometer import Accelerometer
+from domain.aggregated_data import AggregatedData
+from domain.gps import Gps
+from wire_format import HEADER, KIND_AGENT_DATA, MAGIC, VERSION, timestamp_to_seconds
+
+# Columns of a CSV recording, in the order of AgentTrack's arguments
+RECORDING_COLUMNS = ('x', 'y', 'z', 'latitude', 'longitude', 'timestamp')
+
+
+class AgentTrack:
+    """
+    A recorded track held as compact columns, one value per accelerometer sample.
+    Columns are array.array or memoryview over a memory-mapped recording, so a long track costs
+    its raw size and no Python object per sample. timestamp (POSIX seconds) is only known for
+    recordings, the accelerometer and GPS CSV files have no sampling times.
+    """
+
+    def __init__(self, x: Sequence[float], y: Sequence[float], z: Sequence[float], latitude: Sequence[float],
+                 longitude: Sequence[float], timestamp: Optional[Sequence[float]] = None, buffer=None) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timestamp = timestamp
+        # Memory map behind the columns, kept open as long as the track is used
+        self.buffer = buffer
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def sample(self, index: int, timestamp: datetime) -> AggregatedData:
+        return AggregatedData(
+            accelerometer=Accelerometer(self.x[index], self.y[index], self.z[index]),
+            gps=Gps(longitude=self.longitude[index], latitude=self.latitude[index]),
+            timestamp=timestamp,
+        )
+
+    def fill(self, index: int, data: AggregatedData, timestamp: datetime):
+        """Overwrite data with the sample at index, for hot loops that serialize one sample at a time"""
+        data.accelerometer.x = self.x[index]
+        data.accelerometer.y = self.y[index]
+        data.accelerometer.z = self.z[index]
+        data.gps.latitude = self.latitude[index]
+        data.gps.longitude = self.longitude[index]
+        data.timestamp = timestamp
+
+
+def interpolate(values: Sequence[float], length: int) -> array:
+    """Linearly resample values, spread evenly over the track, to length evenly spread points"""
+    if len(values) == 1 or length == 1:
+        return array('d', [values[0]] * length)
+    step = (len(values) - 1) / (length - 1)
+    result = array('d', bytes(8 * length))
+    for index in range(length):
+        position = index * step
+        left = min(int(position), len(values) - 2)
+        result[index] = values[left] + (values[left + 1] - values[left]) * (position - left)
+    return result
+
+
+def load_csv_track(accelerometer_filename: str, gps_filename: str) -> AgentTrack:
+    """
+    Load the accelerometer and GPS CSV files once. Both files cover the same drive but GPS is sampled
+    less often, so GPS is interpolated to every accelerometer sample instead of pairing rows one to one.
+    """
+    x, y, z = array('f'), array('f'), array('f')
+    with open(accelerometer_filename, 'r') as accelerometer_file:
+        rows = csv.reader(accelerometer_file)
+        next(rows)
+        for row in rows:
+            x.append(float(row[0]))
+            y.append(float(row[1]))
+            z.append(float(row[2]))
+    longitude, latitude = array('d'), array('d')
+    with open(gps_filename, 'r') as gps_file:
+        rows = csv.reader(gps_file)
+        next(rows)
+        for row in rows:
+            longitude.append(float(row[0]))
+            latitude.append(float(row[1]))
+    if not x or not longitude:
+        raise ValueError(f"Track {accelerometer_filename}, {gps_filename} has no samples")
+    return AgentTrack(x, y, z, interpolate(latitude, len(x)), interpolate(longitude, len(x)))
+
+
+def load_binary_track(filename: str) -> AgentTrack:
+    """
+    Memory-map a recording in the binary agent data format (see wire_format.py) holding one payload.
+    Columns are views into the mapping, pages are read on first access and shared between processes.
+    """
+    with open(filename, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"Recording {filename} is too short")
+    magic, version, kind, n = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION or kind != KIND_AGENT_DATA:
+        raise ValueError(f"Recording {filename} is not binary agent data")
+    if n == 0 or len(buffer) != HEADER.size + 36 * n:
+        raise ValueError(f"Recording {filename} has a wrong length for {n} samples")
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+    columns = []
+    for typecode, size in (('f', 4), ('f', 4), ('f', 4), ('d', 8), ('d', 8), ('d', 8)):
+        column = view[offset:offset + size * n]
+        if sys.byteorder == 'little':
+            columns.append(column.cast(typecode))
+        else:
+            # The format is little endian, big endian hosts get a swapped copy
+            copy = array(typecode, column.tobytes())
+            copy.byteswap()
+            columns.append(copy)
+        offset += size * n
+    return AgentTrack(*columns, buffer=buffer)
+
+
+def parse_timestamp(value: str) -> float:
+    """POSIX seconds or an ISO 8601 timestamp (naive ones are UTC) as POSIX seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return timestamp_to_seconds(datetime.fromisoformat(value))
+
+
+def load_csv_recording(filename: str) -> AgentTrack:
+    """Load a timestamped recording, a CSV file with the columns x, y, z, latitude, longitude, timestamp"""
+    columns = {name: array('f' if name in ('x', 'y', 'z') else 'd') for name in RECORDING_COLUMNS}
+    with open(filename, 'r') as file:
+        rows = csv.DictReader(file)
+        missing = set(RECORDING_COLUMNS) - set(rows.fieldnames or [])
+        if missing:
+            raise ValueError(f"Recording {filename} misses columns {sorted(missing)}")
+        for row in rows:
+            for name in RECORDING_COLUMNS[:-1]:
+                columns[name].append(float(row[name]))
+            columns['timestamp'].append(parse_timestamp(row['timestamp']))
+    if not columns['x']:
+        raise ValueError(f"Recording {filename} has no samples")
+    return AgentTrack(*(columns[name] for name in RECORDING_COLUMNS))
+
+
+def load_recording(filename: str) -> AgentTrack:
+    """Load a binary (memory-mapped) or CSV recording, told apart by the binary format's magic"""
+    with open(filename, 'rb') as file:
+        is_binary = file.read(len(MAGIC)) == MAGIC
+    return load_binary_track(filename) if is_binary else load_csv_recording(filename)
+
+
+def load_track(accelerometer_filename: str, gps_filename: str, recording_filename: Optional[str] = None):
+    if recording_filename:
+        return load_recording(recording_filename)
+    return load_csv_track(accelerometer_filename, gps_filename)
@@ -14,4 +14,36 @@ MQTT_BROKER_PORT = try_parse(int, os.environ.get('MQTT_BROKER_PORT')) or 1883
 MQTT_AGENT_TOPIC = os.environ.get('MQTT_AGENT_TOPIC') or 'agent'
 MQTT_PARKING_TOPIC = os.environ.get('MQTT_PARKING_TOPIC') or 'parking'
 # Delay for sending data to mqtt in seconds
-DELAY = try_parse(float, os.environ.get('DELAY')) or 1
\ No newline at end of file
+DELAY = try_parse(float, os.environ.get('DELAY')) or 1
+
+# Format of agent data messages: "json" or "binary" (see wire_format.py), parking data is always JSON
+WIRE_FORMAT = os.environ.get('WIRE_FORMAT') or 'json'
+
+# Accelerometer samples per agent message, more than 1 sends columnar batches (AgentDataBatchSchema)
+# of samples read DELAY seconds apart
+AGENT_BATCH_SIZE = try_parse(int, os.environ.get('AGENT_BATCH_SIZE')) or 1
+
+# Recording to replay instead of the accelerometer and GPS files: binary agent data (wire_format.py, one payload,
+# memory-mapped) or CSV with the columns x, y, z, latitude, longitude, timestamp
+AGENT_RECORDING = os.environ.get('AGENT_RECORDING')
+
+# Load generation mode, enabled when LOAD_AGENTS > 0: simulated agents publish to MQTT_AGENT_TOPIC/<agent id>
+# (subscribe the edge to MQTT_AGENT_TOPIC/#) at LOAD_RATE messages per second in total
+LOAD_AGENTS = try_parse(int, os.environ.get('LOAD_AGENTS')) or 0
+LOAD_RATE = try_parse(float, os.environ.get('LOAD_RATE')) or 1000
+LOAD_PROCESSES = try_parse(int, os.environ.get('LOAD_PROCESSES')) or os.cpu_count() or 1
+LOAD_QOS = try_parse(int, os.environ.get('LOAD_QOS'))
+LOAD_QOS = 1 if LOAD_QOS is None else LOAD_QOS
+# Unacknowledged QoS 1 messages per worker connection
+LOAD_MAX_INFLIGHT = try_parse(int, os.environ.get('LOAD_MAX_INFLIGHT')) or 1000
+# Run time in seconds, 0 runs until interrupted
+LOAD_DURATION = try_parse(float, os.environ.get('LOAD_DURATION')) or 0
+LOAD_REPORT_INTERVAL = try_parse(float, os.environ.get('LOAD_REPORT_INTERVAL')) or 5
+# Seed of the agents' random offsets into the track, unset gives different offsets on every run
+LOAD_SEED = try_parse(int, os.environ.get('LOAD_SEED'))
+
+# Replay AGENT_RECORDING with its recorded timing at REPLAY_SPEED times the original speed (0 is as fast as possible)
+# instead of one sample per DELAY, enabled when REPLAY_SPEED is set
+REPLAY_SPEED = try_parse(float, os.environ.get('REPLAY_SPEED'))
+# Start over when the recording ends
+REPLAY_LOOP = (os.environ.get('REPLAY_LOOP') or 'true').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+
+from domain.aggregated_data import AggregatedData
+
+
+@dataclass
+class GpsTrack:
+    # Milliseconds since the base timestamp of the batch
+    offsets_ms: List[int]
+    latitude: List[float]
+    longitude: List[float]
+
+
+@dataclass
+class AgentDataBatch:
+    base_timestamp: datetime
+    # Milliseconds since base_timestamp, one per accelerometer sample
+    offsets_ms: List[int]
+    x: List[int]
+    y: List[int]
+    z: List[int]
+    # GPS fixes are sparser than accelerometer samples, a fix is only added when the position changes
+    gps: GpsTrack
+
+
+def to_agent_data_batch(samples: List[AggregatedData]) -> AgentDataBatch:
+    base_timestamp = samples[0].timestamp
+    offsets_ms = [round((sample.timestamp - base_timestamp).total_seconds() * 1000) for sample in samples]
+    gps = GpsTrack(offsets_ms=[], latitude=[], longitude=[])
+    for offset_ms, sample in zip(offsets_ms, samples):
+        if gps.offsets_ms and gps.latitude[-1] == sample.gps.latitude and gps.longitude[-1] == sample.gps.longitude:
+            continue
+        gps.offsets_ms.append(offset_ms)
+        gps.latitude.append(sample.gps.latitude)
+        gps.longitude.append(sample.gps.longitude)
+    return AgentDataBatch(
+        base_timestamp=base_timestamp,
+        offsets_ms=offsets_ms,
+        x=[sample.accelerometer.x for sample in samples],
+        y=[sample.accelerometer.y for sample in samples],
+        z=[sample.accelerometer.z for sample in samples],
+        gps=gps,
+    )
@@ -1,8 +1,9 @@
 import csv
 from abc import abstractmethod, ABC
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from domain.accelerometer import Accelerometer
+from agent_track import AgentTrack
+from domain.agent_data_batch import AgentDataBatch, to_agent_data_batch
 from domain.aggregated_data import AggregatedData
 from domain.gps import Gps
 from domain.parking import Parking
@@ -22,43 +23,46 @@ class AbstractFileDatasource(ABC):
         pass
 
 
-class AgentFileDatasource(AbstractFileDatasource):
-    def __init__(self, accelerometer_filename: str, gps_filename: str) -> None:
-        self.accelerometer_filename = accelerometer_filename
-        self.gps_filename = gps_filename
-        self.accelerometer_file = None
-        self.gps_file = None
+class PreloadedAgentDatasource(AbstractFileDatasource):
+    """Replays a preloaded AgentTrack, looping over it forever"""
+
+    def __init__(self, track: AgentTrack) -> None:
+        self.track = track
+        self.index = 0
 
     def startReading(self):
-        self.accelerometer_file = open(self.accelerometer_filename, 'r')
-        self.gps_file = open(self.gps_filename, 'r')
-        next(csv.reader(self.accelerometer_file))
-        next(csv.reader(self.gps_file))
+        self.index = 0
 
     def stopReading(self):
-        if self.accelerometer_file:
-            self.accelerometer_file.close()
-        if self.gps_file:
-            self.gps_file.close()
+        pass
 
     def read(self) -> AggregatedData:
-        try:
-            accelerometer_data = next(csv.reader(self.accelerometer_file))
-            gps_data = next(csv.reader(self.gps_file))
-            if accelerometer_data[0] == 'x' and accelerometer_data[1] == 'y' and accelerometer_data[2] == 'z':
-                accelerometer_data = next(csv.reader(self.accelerometer_file))
-            if gps_data[0] == 'longitude' and gps_data[1] == 'latitude':
-                gps_data = next(csv.reader(self.gps_file))
-        except StopIteration:
-            self.accelerometer_file.seek(0)
-            self.gps_file.seek(0)
-            return self.read()
+        data = self.track.sample(self.index, datetime.now())
+        self.index = (self.index + 1) % len(self.track)
+        return data
 
-        return AggregatedData(
-            accelerometer=Accelerometer(*accelerometer_data),
-            gps=Gps(*gps_data),
-            timestamp=datetime.now()
-        )
+
+class AgentBatchFileDatasource(AbstractFileDatasource):
+    """Reads batch_size samples of an agent datasource per call, sample_interval seconds apart"""
+
+    def __init__(self, datasource: AbstractFileDatasource, batch_size: int, sample_interval: float) -> None:
+        self.datasource = datasource
+        self.batch_size = batch_size
+        self.sample_interval = sample_interval
+
+    def startReading(self):
+        self.datasource.startReading()
+
+    def stopReading(self):
+        self.datasource.stopReading()
+
+    def read(self) -> AgentDataBatch:
+        samples = [self.datasource.read() for _ in range(self.batch_size)]
+        # Samples are read at once, spread their timestamps as if they were sampled one by one
+        end = samples[-1].timestamp
+        for index, sample in enumerate(samples):
+            sample.timestamp = end - timedelta(seconds=self.sample_interval * (self.batch_size - 1 - index))
+        return to_agent_data_batch(samples)
 
 
 class ParkingFileDatasource(AbstractFileDatasource):
@@ -0,0 +1,173 @@
+import multiprocessing
+import queue
+import random
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from paho.mqtt import client as mqtt_client
+
+from agent_track import load_track
+from domain.accelerometer import Accelerometer
+from domain.aggregated_data import AggregatedData
+from domain.gps import Gps
+from schema.aggregated_data_schema import AggregatedDataSchema
+from wire_format import BinaryAggregatedDataSchema
+
+# How often a worker checks how many messages are due, the rate is kept by publishing the backlog each tick
+TICK = 0.005
+# How often workers send their counters to the parent, short so the parent's report intervals line up
+WORKER_REPORT_INTERVAL = 0.5
+
+
+@dataclass
+class LoadReport:
+    """Counters of one worker for one report interval"""
+    sent: int = 0
+    acked: int = 0
+    failed: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def merge(self, other: 'LoadReport'):
+        self.sent += other.sent
+        self.acked += other.acked
+        self.failed += other.failed
+        self.latencies.extend(other.latencies)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def format_report(report: LoadReport, elapsed: float) -> str:
+    latencies = sorted(report.latencies)
+    return (f"sent {report.sent / elapsed:.0f} msg/s, acked {report.acked / elapsed:.0f} msg/s, "
+            f"failed {report.failed}, publish latency ms "
+            f"p50 {percentile(latencies, 0.50) * 1000:.2f} p95 {percentile(latencies, 0.95) * 1000:.2f} "
+            f"p99 {percentile(latencies, 0.99) * 1000:.2f} max {percentile(latencies, 1.0) * 1000:.2f}")
+
+
+def run_worker(broker: str, port: int, topic: str, agents: List[Tuple[int, int]], rate: float, qos: int,
+               wire_format: str, max_inflight: int, recording: Optional[str], reports, stop_event):
+    """
+    Publish messages of the given virtual agents at rate msg/s in total until stop_event is set.
+    Every agent is an (agent id, offset into the track) pair and publishes to topic/<agent id>.
+    """
+    # Ctrl+C reaches the whole process group, the parent stops the workers through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    track = load_track("data/accelerometer.csv", "data/gps.csv", recording)
+    schema = BinaryAggregatedDataSchema() if wire_format == 'binary' else AggregatedDataSchema()
+    topics = [f"{topic}/{agent_id}" for agent_id, _ in agents]
+    positions = [offset % len(track) for _, offset in agents]
+    # Messages are serialized right away, so one sample object is refilled for all of them
+    data = AggregatedData(accelerometer=Accelerometer(0, 0, 0), gps=Gps(0, 0), timestamp=datetime.now())
+
+    # on_publish runs on the network thread, it only records the acknowledgement and the publishing
+    # loop matches it to the send time, so no lock is shared with paho's internal ones
+    acks = deque()
+    client = mqtt_client.Client()
+    client.max_inflight_messages_set(max_inflight)
+    client.on_publish = lambda client, userdata, mid: acks.append((mid, time.perf_counter()))
+    client.connect(broker, port)
+    client.loop_start()
+
+    sent_at = {}
+    report = LoadReport()
+    agent_index = 0
+    sent_total = 0
+    start = report_start = time.perf_counter()
+    while not stop_event.is_set():
+        now = time.perf_counter()
+        # Publish everything due since the start, so a slow tick is caught up instead of lowering the rate
+        for _ in range(int((now - start) * rate) - sent_total):
+            track.fill(positions[agent_index], data, datetime.now())
+            positions[agent_index] = (positions[agent_index] + 1) % len(track)
+            msg = schema.dumps(data)
+            result = client.publish(topics[agent_index], msg, qos=qos)
+            if result.rc == mqtt_client.MQTT_ERR_SUCCESS:
+                sent_at[result.mid] = time.perf_counter()
+                report.sent += 1
+            else:
+                report.failed += 1
+            sent_total += 1
+            agent_index = (agent_index + 1) % len(agents)
+
+        while acks:
+            mid, acked_at = acks.popleft()
+            published_at = sent_at.pop(mid, None)
+            if published_at is not None:
+                report.acked += 1
+                report.latencies.append(acked_at - published_at)
+
+        if now - report_start >= WORKER_REPORT_INTERVAL:
+            reports.put(report)
+            report = LoadReport()
+            report_start = now
+        time.sleep(max(0.0, now + TICK - time.perf_counter()))
+
+    reports.put(report)
+    client.loop_stop()
+    client.disconnect()
+
+
+def run_load(broker: str, port: int, topic: str, agent_count: int, rate: float, processes: int, qos: int,
+             wire_format: str, max_inflight: int, duration: float, report_interval: float, seed=None,
+             recording: Optional[str] = None):
+    """
+    Simulate agent_count agents publishing rate msg/s in total from processes worker processes,
+    printing throughput and publish latency (until PUBACK for QoS 1) every report_interval seconds.
+    Runs for duration seconds, or until interrupted when duration is 0. Agents replay the CSV track,
+    or the binary recording when given, which the workers memory-map and so share.
+    """
+    processes = max(1, min(processes, agent_count))
+    track_length = len(load_track("data/accelerometer.csv", "data/gps.csv", recording))
+    generator = random.Random(seed)
+    agents = [(agent_id, generator.randrange(track_length)) for agent_id in range(agent_count)]
+
+    reports = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(target=run_worker, daemon=True, args=(
+            broker, port, topic, agents[index::processes], rate / processes, qos, wire_format,
+            max_inflight, recording, reports, stop_event,
+        ))
+        for index in range(processes)
+    ]
+    print(f"Simulating {agent_count} agents at {rate:.0f} msg/s from {processes} processes ({broker}:{port})")
+    for worker in workers:
+        worker.start()
+
+    total = LoadReport()
+    start = interval_start = time.perf_counter()
+    interval = LoadReport()
+    try:
+        while not duration or time.perf_counter() - start < duration:
+            try:
+                interval.merge(reports.get(timeout=WORKER_REPORT_INTERVAL))
+            except queue.Empty:
+                pass
+            now = time.perf_counter()
+            if now - interval_start >= report_interval:
+                print(format_report(interval, now - interval_start))
+                total.merge(interval)
+                interval = LoadReport()
+                interval_start = now
+    except KeyboardInterrupt:
+        pass
+
+    stop_event.set()
+    # Collect the last reports the workers send when stopping, a worker only exits once its reports are read
+    while any(worker.is_alive() for worker in workers) or not reports.empty():
+        try:
+            interval.merge(reports.get(timeout=0.5))
+        except queue.Empty:
+            pass
+    for worker in workers:
+        worker.join()
+    total.merge(interval)
+    print(f"Total: {format_report(total, time.perf_counter() - start)}")
@@ -3,10 +3,15 @@ import threading
 from paho.mqtt import client as mqtt_client
 import time
 
-from file_datasource import AgentFileDatasource, ParkingFileDatasource
+from agent_track import load_track
+from file_datasource import AgentBatchFileDatasource, ParkingFileDatasource, PreloadedAgentDatasource
+from load_generator import run_load
+from replay import replay
+from schema.agent_data_batch_schema import AgentDataBatchSchema
 from schema.aggregated_data_schema import AggregatedDataSchema
 import config
 from schema.parking_schema import ParkingSchema
+from wire_format import BinaryAgentDataBatchSchema, BinaryAggregatedDataSchema
 
 
 def connect_mqtt(broker, port):
@@ -42,16 +47,50 @@ def publish(client, topic, datasource, schema, delay):
             print(f"Failed to send message to topic {topic}")
 
 
+def run_replay(client, topic):
+    if not config.AGENT_RECORDING:
+        raise ValueError("REPLAY_SPEED needs AGENT_RECORDING")
+    schema = BinaryAggregatedDataSchema() if config.WIRE_FORMAT == 'binary' else AggregatedDataSchema()
+
+    def send(data):
+        result = client.publish(topic, schema.dumps(data))
+        if result[0] != 0:
+            print(f"Failed to send message to topic {topic}")
+
+    print(f"Replaying {config.AGENT_RECORDING} at {config.REPLAY_SPEED or 'max'}x speed")
+    stats = replay(load_track("data/accelerometer.csv", "data/gps.csv", config.AGENT_RECORDING), send,
+                   config.REPLAY_SPEED, config.REPLAY_LOOP)
+    print(stats)
+
+
 def run():
+    if config.LOAD_AGENTS > 0:
+        run_load(config.MQTT_BROKER_HOST, config.MQTT_BROKER_PORT, config.MQTT_AGENT_TOPIC, config.LOAD_AGENTS,
+                 config.LOAD_RATE, config.LOAD_PROCESSES, config.LOAD_QOS, config.WIRE_FORMAT,
+                 config.LOAD_MAX_INFLIGHT, config.LOAD_DURATION, config.LOAD_REPORT_INTERVAL, config.LOAD_SEED,
+                 config.AGENT_RECORDING)
+        return
     # Prepare mqtt client
     client = connect_mqtt(config.MQTT_BROKER_HOST, config.MQTT_BROKER_PORT)
+    if config.REPLAY_SPEED is not None:
+        run_replay(client, config.MQTT_AGENT_TOPIC)
+        return
     # Prepare datasources
-    agent_datasource = AgentFileDatasource("data/accelerometer.csv", "data/gps.csv")
+    agent_datasource = PreloadedAgentDatasource(
+        load_track("data/accelerometer.csv", "data/gps.csv", config.AGENT_RECORDING)
+    )
     parking_datasource = ParkingFileDatasource("data/parking.csv")
 
+    agent_delay = config.DELAY
+    agent_schema = BinaryAggregatedDataSchema if config.WIRE_FORMAT == 'binary' else AggregatedDataSchema
+    if config.AGENT_BATCH_SIZE > 1:
+        agent_datasource = AgentBatchFileDatasource(agent_datasource, config.AGENT_BATCH_SIZE, config.DELAY)
+        agent_delay = config.DELAY * config.AGENT_BATCH_SIZE
+        agent_schema = BinaryAgentDataBatchSchema if config.WIRE_FORMAT == 'binary' else AgentDataBatchSchema
+
     # Infinity publish data
     thread1 = threading.Thread(target=publish, args=(client, config.MQTT_AGENT_TOPIC, agent_datasource,
-                                                     AggregatedDataSchema, config.DELAY))
+                                                     agent_schema, agent_delay))
     thread2 = threading.Thread(target=publish, args=(client, config.MQTT_PARKING_TOPIC, parking_datasource,
                                                      ParkingSchema, config.DELAY))
     thread1.start()
@@ -0,0 +1,73 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from agent_track import AgentTrack
+from domain.accelerometer import Accelerometer
+from domain.aggregated_data import AggregatedData
+from domain.gps import Gps
+
+# Longest single sleep, so a stop request is noticed during long gaps of a recording
+MAX_SLEEP = 0.5
+
+
+@dataclass
+class ReplayStats:
+    samples: int = 0
+    elapsed: float = 0
+    # How late samples were sent after their deadline, in seconds
+    max_lag: float = 0
+    total_lag: float = 0
+
+    def __str__(self) -> str:
+        rate = self.samples / self.elapsed if self.elapsed else 0
+        mean_lag = self.total_lag / self.samples if self.samples else 0
+        return (f"replayed {self.samples} samples in {self.elapsed:.2f} s ({rate:.0f} samples/s), "
+                f"lag ms mean {mean_lag * 1000:.2f} max {self.max_lag * 1000:.2f}")
+
+
+def replay(track: AgentTrack, send: Callable[[AggregatedData], None], speed: float, loop: bool,
+           should_stop: Callable[[], bool] = lambda: False) -> ReplayStats:
+    """
+    Send the samples of a timestamped track with their recorded spacing divided by speed, or as fast as
+    possible when speed is 0. Every sample has an absolute deadline from the start of the replay, so
+    time spent sending and oversleeping is not added up: late samples are sent right away to catch up.
+    Samples keep their recorded offsets from the first one, starting at the time the replay starts.
+    Loops keep going where the previous one ended, one mean sample interval later.
+    send gets the same AggregatedData object refilled for every sample, it must not keep it.
+    """
+    if track.timestamp is None:
+        raise ValueError("Only recordings with timestamps can be replayed")
+    for index in range(1, len(track)):
+        if track.timestamp[index] < track.timestamp[index - 1]:
+            raise ValueError(f"Recording timestamps go back in time at sample {index}")
+
+    first = track.timestamp[0]
+    duration = track.timestamp[len(track) - 1] - first
+    period = duration + (duration / (len(track) - 1) if len(track) > 1 else 1)
+    base_timestamp = datetime.now()
+    data = AggregatedData(accelerometer=Accelerometer(0, 0, 0), gps=Gps(0, 0), timestamp=base_timestamp)
+
+    stats = ReplayStats()
+    start = time.perf_counter()
+    loop_offset = 0
+    while True:
+        for index in range(len(track)):
+            offset = loop_offset + track.timestamp[index] - first
+            if speed > 0:
+                deadline = start + offset / speed
+                while (remaining := deadline - time.perf_counter()) > 0:
+                    if should_stop():
+                        return stats
+                    time.sleep(min(remaining, MAX_SLEEP))
+                lag = time.perf_counter() - deadline
+                stats.total_lag += lag
+                stats.max_lag = max(stats.max_lag, lag)
+            track.fill(index, data, base_timestamp + timedelta(seconds=offset))
+            send(data)
+            stats.samples += 1
+            stats.elapsed = time.perf_counter() - start
+        if not loop or should_stop():
+            return stats
+        loop_offset += period
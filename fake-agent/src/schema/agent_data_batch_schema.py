@@ -0,0 +1,16 @@
+from marshmallow import Schema, fields
+
+
+class GpsTrackSchema(Schema):
+    offsets_ms = fields.List(fields.Int())
+    latitude = fields.List(fields.Number())
+    longitude = fields.List(fields.Number())
+
+
+class AgentDataBatchSchema(Schema):
+    base_timestamp = fields.DateTime('iso')
+    offsets_ms = fields.List(fields.Int())
+    x = fields.List(fields.Int())
+    y = fields.List(fields.Int())
+    z = fields.List(fields.Int())
+    gps = fields.Nested(GpsTrackSchema)
@@ -0,0 +1,66 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from domain.accelerometer import Accelerometer
+from domain.agent_data_batch import AgentDataBatch
+from domain.aggregated_data import AggregatedData
+from domain.gps import Gps
+
+# Binary payloads start with this header, JSON payloads start with "{" or "[" so receivers can tell them apart:
+# magic, format version, payload kind, number of samples N. The header is followed by the columns
+# x, y, z as float32[N], latitude, longitude as float64[N] and timestamp as float64[N] POSIX seconds
+# (naive timestamps are UTC).
+MAGIC = b"RV"
+VERSION = 1
+KIND_AGENT_DATA = 1
+HEADER = struct.Struct("<2sBBI")
+
+
+def timestamp_to_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def encode_agent_data(batch: List[AggregatedData]) -> bytes:
+    """Pack agent data samples into one binary payload."""
+    n = len(batch)
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, KIND_AGENT_DATA, n),
+        struct.pack(f"<{n}f", *(float(data.accelerometer.x) for data in batch)),
+        struct.pack(f"<{n}f", *(float(data.accelerometer.y) for data in batch)),
+        struct.pack(f"<{n}f", *(float(data.accelerometer.z) for data in batch)),
+        struct.pack(f"<{n}d", *(float(data.gps.latitude) for data in batch)),
+        struct.pack(f"<{n}d", *(float(data.gps.longitude) for data in batch)),
+        struct.pack(f"<{n}d", *(timestamp_to_seconds(data.timestamp) for data in batch)),
+    ))
+
+
+class BinaryAggregatedDataSchema:
+    """Drop-in for AggregatedDataSchema in publish() that sends the compact binary format."""
+
+    def dumps(self, data: AggregatedData) -> bytes:
+        return encode_agent_data([data])
+
+
+def agent_data_batch_samples(batch: AgentDataBatch) -> List[AggregatedData]:
+    """Expand a batch to samples, each with the last GPS fix taken at or before it"""
+    samples = []
+    gps_index = 0
+    for index, offset_ms in enumerate(batch.offsets_ms):
+        while gps_index + 1 < len(batch.gps.offsets_ms) and batch.gps.offsets_ms[gps_index + 1] <= offset_ms:
+            gps_index += 1
+        samples.append(AggregatedData(
+            accelerometer=Accelerometer(batch.x[index], batch.y[index], batch.z[index]),
+            gps=Gps(longitude=batch.gps.longitude[gps_index], latitude=batch.gps.latitude[gps_index]),
+            timestamp=batch.base_timestamp + timedelta(milliseconds=offset_ms),
+        ))
+    return samples
+
+
+class BinaryAgentDataBatchSchema:
+    """Drop-in for AgentDataBatchSchema in publish() that sends the batch as one binary payload."""
+
+    def dumps(self, batch: AgentDataBatch) -> bytes:
+        return encode_agent_data(agent_data_batch_samples(batch))
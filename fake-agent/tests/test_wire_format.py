@@ -0,0 +1,65 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from agent_track import load_binary_track
+from domain.accelerometer import Accelerometer
+from domain.agent_data_batch import to_agent_data_batch
+from domain.aggregated_data import AggregatedData
+from domain.gps import Gps
+from wire_format import HEADER, KIND_AGENT_DATA, MAGIC, VERSION, agent_data_batch_samples, encode_agent_data
+
+STARTED = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def make_samples(n):
+    # The position only changes every third sample, like a GPS sampled less often than the accelerometer
+    return [
+        AggregatedData(
+            accelerometer=Accelerometer(-17.0 + i, 4.5 - i, 16516.0),
+            gps=Gps(longitude=30.524547100067142, latitude=50.450386085935094 + (i // 3) * 1e-5),
+            timestamp=STARTED + timedelta(milliseconds=100 * i),
+        )
+        for i in range(n)
+    ]
+
+
+def test_encode_agent_data_layout():
+    samples = make_samples(2)
+    payload = encode_agent_data(samples)
+    assert HEADER.unpack_from(payload) == (MAGIC, VERSION, KIND_AGENT_DATA, 2)
+    values = struct.unpack_from('<2f2f2f2d2d2d', payload, HEADER.size)
+    assert len(payload) == HEADER.size + 2 * 36
+    assert values[0:2] == (-17.0, -16.0)
+    assert values[6:8] == (50.450386085935094, 50.450386085935094)
+    # Naive timestamps are UTC
+    assert values[10] == STARTED.replace(tzinfo=timezone.utc).timestamp()
+
+
+def test_encode_agent_data_round_trip(tmp_path):
+    samples = make_samples(7)
+    filename = tmp_path / 'recording.bin'
+    filename.write_bytes(encode_agent_data(samples))
+    track = load_binary_track(str(filename))
+    assert len(track) == 7
+    assert list(track.x) == [sample.accelerometer.x for sample in samples]
+    assert list(track.y) == [sample.accelerometer.y for sample in samples]
+    assert list(track.latitude) == [sample.gps.latitude for sample in samples]
+    assert list(track.longitude) == [sample.gps.longitude for sample in samples]
+    assert list(track.timestamp) == [sample.timestamp.replace(tzinfo=timezone.utc).timestamp() for sample in samples]
+
+
+def test_load_binary_track_rejects_truncated_recordings(tmp_path):
+    filename = tmp_path / 'recording.bin'
+    filename.write_bytes(encode_agent_data(make_samples(3))[:-1])
+    with pytest.raises(ValueError):
+        load_binary_track(str(filename))
+
+
+def test_agent_data_batch_round_trip():
+    samples = make_samples(7)
+    batch = to_agent_data_batch(samples)
+    # Only the changed positions are sent as GPS fixes
+    assert batch.gps.offsets_ms == [0, 300, 600]
+    assert agent_data_batch_samples(batch) == samples
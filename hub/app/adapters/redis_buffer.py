@@ -0,0 +1,191 @@
+from typing import List
+
+from redis import Redis
+
+from app.interfaces.buffer_gateway import BufferGateway
+
+# Lua's unpack fails with "too many results to unpack" past a few thousand values (LUAI_MAXCSTACK),
+# so scripts push long item lists in slices of at most 1000 values
+RPUSH_ALL = """
+local function rpush_all(key, values)
+    for i = 1, #values, 1000 do
+        redis.call('RPUSH', key, unpack(values, i, math.min(i + 999, #values)))
+    end
+end
+"""
+
+# KEYS: buffer list, arrival times list
+# Appends items and their arrival times in ms, kept in a parallel list so that the age of
+# the oldest buffered item is known after partial claims and recoveries
+PUSH_SCRIPT = RPUSH_ALL + """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local arrivals = {}
+for i = 1, #ARGV do
+    arrivals[i] = now
+end
+rpush_all(KEYS[1], ARGV)
+rpush_all(KEYS[2], arrivals)
+return redis.call('LLEN', KEYS[1])
+"""
+
+# KEYS: buffer list, arrival times list, in-flight list of the consumer, claims hash
+# ARGV: batch size, max age in ms, consumer id
+# Re-delivers the unacknowledged batch of the consumer, otherwise moves a full batch or an
+# overdue partial batch from the head of the buffer to the in-flight list in one atomic step,
+# so hub replicas sharing the Redis never split or interleave a batch
+CLAIM_SCRIPT = RPUSH_ALL + """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local in_flight = redis.call('LRANGE', KEYS[3], 0, -1)
+if #in_flight > 0 then
+    redis.call('HSET', KEYS[4], ARGV[3], now)
+    return in_flight
+end
+local batch_size = tonumber(ARGV[1])
+local length = redis.call('LLEN', KEYS[1])
+if length == 0 then
+    return {}
+end
+if length < batch_size then
+    local first = tonumber(redis.call('LINDEX', KEYS[2], 0) or now)
+    if now - first < tonumber(ARGV[2]) then
+        return {}
+    end
+end
+local items = redis.call('LRANGE', KEYS[1], 0, batch_size - 1)
+redis.call('LTRIM', KEYS[1], batch_size, -1)
+redis.call('LTRIM', KEYS[2], batch_size, -1)
+rpush_all(KEYS[3], items)
+redis.call('HSET', KEYS[4], ARGV[3], now)
+return items
+"""
+
+# KEYS: buffer list, arrival times list, claims hash, attempts hash
+# ARGV: claim timeout in ms, in-flight list key prefix
+# Puts abandoned in-flight batches back to the head of the buffer, marked as overdue. Batches are
+# pushed latest claim first, so the earliest claimed batch ends up at the head and arrival order is kept
+RECOVER_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local claims = redis.call('HGETALL', KEYS[3])
+local stale = {}
+for i = 1, #claims, 2 do
+    local claimed_at = tonumber(claims[i + 1])
+    if now - claimed_at >= tonumber(ARGV[1]) then
+        table.insert(stale, {claims[i], claimed_at})
+    end
+end
+table.sort(stale, function(a, b) return a[2] > b[2] end)
+local recovered = 0
+for _, claim in ipairs(stale) do
+    local in_flight_key = ARGV[2] .. claim[1]
+    local items = redis.call('LRANGE', in_flight_key, 0, -1)
+    for j = #items, 1, -1 do
+        redis.call('LPUSH', KEYS[1], items[j])
+        redis.call('LPUSH', KEYS[2], 0)
+    end
+    redis.call('DEL', in_flight_key)
+    redis.call('HDEL', KEYS[3], claim[1])
+    redis.call('HDEL', KEYS[4], claim[1])
+    recovered = recovered + #items
+end
+return recovered
+"""
+
+# KEYS: in-flight list of the consumer, dead-letter list, claims hash, attempts hash
+# ARGV: consumer id
+# Moves the in-flight batch of the consumer to the end of the dead-letter list
+DEAD_LETTER_SCRIPT = RPUSH_ALL + """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+rpush_all(KEYS[2], items)
+redis.call('DEL', KEYS[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+return #items
+"""
+
+# KEYS: dead-letter list, buffer list, arrival times list
+# ARGV: maximum number of items to move
+# Moves items from the head of the dead-letter list to the end of the buffer as newly arrived ones
+REQUEUE_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+for _, item in ipairs(items) do
+    redis.call('RPUSH', KEYS[2], item)
+    redis.call('RPUSH', KEYS[3], now)
+end
+redis.call('LTRIM', KEYS[1], #items, -1)
+return #items
+"""
+
+# Items moved by one requeue script call, so a long dead-letter list does not block Redis at once
+REQUEUE_CHUNK_SIZE = 1000
+
+
+class RedisBuffer(BufferGateway):
+    """
+    FIFO buffer on a Redis list: items are pushed to the tail and batches are claimed from the head.
+    Claimed batches are kept in a per consumer in-flight list until they are acknowledged, batches that
+    cannot be saved are moved to a dead-letter list.
+    The scripts address in-flight lists by name, so a single Redis instance (not a cluster) is expected.
+    """
+
+    def __init__(self, redis_client: Redis, key: str = "processed_agent_data"):
+        self.redis_client = redis_client
+        self.key = key
+        self.arrivals_key = f"{key}:arrivals"
+        self.claims_key = f"{key}:claims"
+        self.attempts_key = f"{key}:attempts"
+        self.dead_letter_key = f"{key}:dead_letter"
+        self.in_flight_prefix = f"{key}:in_flight:"
+        self._push = redis_client.register_script(PUSH_SCRIPT)
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+        self._recover = redis_client.register_script(RECOVER_SCRIPT)
+        self._dead_letter = redis_client.register_script(DEAD_LETTER_SCRIPT)
+        self._requeue = redis_client.register_script(REQUEUE_SCRIPT)
+
+    def push(self, items: List[str]) -> int:
+        if not items:
+            return self.redis_client.llen(self.key)
+        return self._push(keys=[self.key, self.arrivals_key], args=items)
+
+    def claim_batch(self, consumer_id: str, batch_size: int, max_age: float) -> List[bytes]:
+        return self._claim(
+            keys=[self.key, self.arrivals_key, self.in_flight_prefix + consumer_id, self.claims_key],
+            args=[batch_size, int(max_age * 1000), consumer_id],
+        )
+
+    def ack(self, consumer_id: str):
+        pipeline = self.redis_client.pipeline(transaction=True)
+        pipeline.delete(self.in_flight_prefix + consumer_id)
+        pipeline.hdel(self.claims_key, consumer_id)
+        pipeline.hdel(self.attempts_key, consumer_id)
+        pipeline.execute()
+
+    def record_failure(self, consumer_id: str) -> int:
+        return self.redis_client.hincrby(self.attempts_key, consumer_id, 1)
+
+    def dead_letter(self, consumer_id: str) -> int:
+        return self._dead_letter(
+            keys=[self.in_flight_prefix + consumer_id, self.dead_letter_key, self.claims_key, self.attempts_key],
+            args=[consumer_id],
+        )
+
+    def requeue_dead_letter(self) -> int:
+        requeued = 0
+        while True:
+            moved = self._requeue(keys=[self.dead_letter_key, self.key, self.arrivals_key], args=[REQUEUE_CHUNK_SIZE])
+            requeued += moved
+            if moved < REQUEUE_CHUNK_SIZE:
+                return requeued
+
+    def dead_letter_length(self) -> int:
+        return self.redis_client.llen(self.dead_letter_key)
+
+    def recover_stale(self, claim_timeout: float) -> int:
+        return self._recover(
+            keys=[self.key, self.arrivals_key, self.claims_key, self.attempts_key],
+            args=[int(claim_timeout * 1000), self.in_flight_prefix],
+        )
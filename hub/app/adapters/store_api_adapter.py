@@ -1,23 +1,40 @@
-import json
 import logging
 from typing import List
-import requests
-from app.entities.processed_agent_data import ProcessedAgentData
-from app.interfaces.store_api_gateway import StoreGateway
+from app.adapters.http_session import create_http_session, encode_json_body
+from app.entities.processed_agent_data import ProcessedAgentData, processed_agent_data_batch_adapter
+from app.interfaces.store_api_gateway import StoreGateway, StoreRejectedError
+
+# Client errors that do not depend on the request body, the same request may succeed later
+RETRYABLE_CLIENT_ERRORS = (408, 429)
 
 
 class StoreApiAdapter(StoreGateway):
-    def __init__(self, api_base_url):
+    def __init__(self, api_base_url, pool_size=10, timeout=(3.0, 30.0), retries=3, backoff_factor=0.2,
+                 backoff_jitter=0.2, use_gzip=False):
         self.api_base_url = api_base_url
+        self.timeout = timeout
+        self.use_gzip = use_gzip
+        # Keep-alive connections shared by all ingestion workers
+        self.session = create_http_session(pool_size=pool_size, retries=retries, backoff_factor=backoff_factor,
+                                           backoff_jitter=backoff_jitter)
 
     def save_data(self, processed_agent_data_batch: List[ProcessedAgentData]):
+        # Serialize the whole batch straight to bytes in one pydantic call
+        return self.save_encoded(processed_agent_data_batch_adapter.dump_json(processed_agent_data_batch))
+
+    def save_encoded(self, processed_agent_data_batch_json: bytes):
         try:
-            data = [json.loads(item.json()) for item in processed_agent_data_batch]
-            response = requests.post(f"{self.api_base_url}/processed_agent_data/", json=data)
+            body, headers = encode_json_body(processed_agent_data_batch_json, use_gzip=self.use_gzip)
+            response = self.session.post(f"{self.api_base_url}/processed_agent_data/", data=body, headers=headers,
+                                         timeout=self.timeout)
+            if 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS:
+                raise StoreRejectedError(f"Store API rejected data with {response.status_code}: {response.text}")
             if response.status_code != 200:
                 logging.error(f"Failed to save data to the Store API: {response.text}")
                 return False
             return True
+        except StoreRejectedError:
+            raise
         except Exception as e:
             logging.error(f"An error occurred while saving data to the Store API: {e}")
             return False
@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class BufferGateway(ABC):
+    """
+    Abstract class representing the shared buffer for processed agent data.
+    Batches are claimed by a consumer, stay in flight until acknowledged and are
+    retried if the consumer fails to send them, or moved to a dead-letter list.
+    All buffer adapters must implement these methods.
+    """
+
+    @abstractmethod
+    def push(self, items: List[str]) -> int:
+        """
+        Method to append serialized items to the end of the buffer.
+        Parameters:
+            items (List[str]): Serialized processed agent data in arrival order.
+        Returns:
+            int: Length of the buffer after the push.
+        """
+        pass
+
+    @abstractmethod
+    def claim_batch(self, consumer_id: str, batch_size: int, max_age: float) -> List[bytes]:
+        """
+        Method to claim the next batch for a consumer.
+        If the consumer has an unacknowledged batch, that batch is returned again. Otherwise the
+        oldest batch_size items are moved to the in-flight list of the consumer, or fewer items
+        if the oldest buffered item is older than max_age seconds.
+        Parameters:
+            consumer_id (str): Unique id of the consumer.
+            batch_size (int): Number of items in a full batch.
+            max_age (float): Seconds after which a partial batch is flushed.
+        Returns:
+            List[bytes]: Items of the batch in arrival order, empty if nothing is due.
+        """
+        pass
+
+    @abstractmethod
+    def ack(self, consumer_id: str):
+        """
+        Method to acknowledge that the in-flight batch of the consumer is saved.
+        Parameters:
+            consumer_id (str): Unique id of the consumer.
+        """
+        pass
+
+    @abstractmethod
+    def record_failure(self, consumer_id: str) -> int:
+        """
+        Method to count a failed attempt to save the in-flight batch of the consumer.
+        Parameters:
+            consumer_id (str): Unique id of the consumer.
+        Returns:
+            int: Number of failed attempts for the batch so far, reset when it is acknowledged.
+        """
+        pass
+
+    @abstractmethod
+    def dead_letter(self, consumer_id: str) -> int:
+        """
+        Method to move the in-flight batch of the consumer to the dead-letter list, for a batch
+        that the Store rejects, so it stops blocking the consumer.
+        Parameters:
+            consumer_id (str): Unique id of the consumer.
+        Returns:
+            int: Number of items moved.
+        """
+        pass
+
+    @abstractmethod
+    def requeue_dead_letter(self) -> int:
+        """
+        Method to move every dead-lettered item back to the end of the buffer, e.g. after the Store
+        was fixed to accept them.
+        Returns:
+            int: Number of items moved.
+        """
+        pass
+
+    @abstractmethod
+    def dead_letter_length(self) -> int:
+        """
+        Method to get the number of items in the dead-letter list.
+        Returns:
+            int: Number of dead-lettered items.
+        """
+        pass
+
+    @abstractmethod
+    def recover_stale(self, claim_timeout: float) -> int:
+        """
+        Method to return in-flight batches of consumers that did not touch them for
+        claim_timeout seconds to the head of the buffer, e.g. after a hub replica died.
+        Parameters:
+            claim_timeout (float): Seconds after which a claim is considered abandoned.
+        Returns:
+            int: Number of items returned to the buffer.
+        """
+        pass
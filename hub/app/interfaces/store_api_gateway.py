@@ -3,6 +3,10 @@ from typing import List
 from app.entities.processed_agent_data import ProcessedAgentData
 
 
+class StoreRejectedError(Exception):
+    """Raised when the Store rejects data for good, e.g. with a validation error, so sending it again is useless."""
+
+
 class StoreGateway(ABC):
     """
     Abstract class representing the Store Gateway interface.
@@ -15,6 +19,22 @@ class StoreGateway(ABC):
         Parameters:
             processed_agent_data_batch (ProcessedAgentData): The processed agent data to be saved.
         Returns:
-            bool: True if the data is successfully saved, False otherwise.
+            bool: True if the data is successfully saved, False if it may be saved by trying again.
+        Raises:
+            StoreRejectedError: If the Store refuses the data and retrying cannot help.
+        """
+        pass
+
+    @abstractmethod
+    def save_encoded(self, processed_agent_data_batch_json: bytes) -> bool:
+        """
+        Method to save processed agent data that is already serialized, e.g. joined from the buffer,
+        without decoding and encoding it again.
+        Parameters:
+            processed_agent_data_batch_json (bytes): JSON array of ProcessedAgentData.
+        Returns:
+            bool: True if the data is successfully saved, False if it may be saved by trying again.
+        Raises:
+            StoreRejectedError: If the Store refuses the data and retrying cannot help.
         """
         pass
@@ -0,0 +1,237 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Union
+
+from app.entities.processed_agent_data import ProcessedAgentData, processed_agent_data_batch_adapter
+from app.interfaces.buffer_gateway import BufferGateway
+from app.interfaces.store_api_gateway import StoreGateway, StoreRejectedError
+from app.wire_format import decode_processed_agent_data, is_binary
+
+# Raw MQTT payload or already validated data from the HTTP API
+IngestionItem = Union[bytes, List[ProcessedAgentData]]
+
+
+class IngestionPipeline:
+    """
+    Decouples receiving processed agent data from buffering it and flushing it to the Store.
+    Producers (the MQTT callback, HTTP endpoints) only put items to a bounded queue, a pool of worker
+    threads validates them and pushes them to the shared buffer. Every worker also flushes batches
+    to the Store: full batches right away and partial ones once the oldest item is flush_max_age
+    seconds old. A batch stays in flight in the buffer until the Store accepts it, so it is retried
+    after a failure instead of being lost. Each worker waits retry_backoff seconds before retrying, doubled
+    after every failed attempt up to retry_backoff_max, so an unavailable Store is not hammered. Only a
+    batch the Store rejects is moved to the buffer's dead-letter list, so it does not block the batches
+    after it, from where requeue_dead_letter puts it back once the Store accepts it.
+    """
+
+    def __init__(
+        self,
+        buffer: BufferGateway,
+        store_gateway: StoreGateway,
+        batch_size: int,
+        queue_size: int = 1000,
+        workers: int = 1,
+        flush_max_age: float = 5.0,
+        flush_interval: float = 1.0,
+        claim_timeout: float = 60.0,
+        retry_backoff: float = 1.0,
+        retry_backoff_max: float = 30.0,
+        instance_id: str = "hub",
+    ):
+        self.buffer = buffer
+        self.store_gateway = store_gateway
+        self.batch_size = batch_size
+        self.workers = workers
+        self.flush_max_age = flush_max_age
+        self.flush_interval = flush_interval
+        self.claim_timeout = claim_timeout
+        self.retry_backoff = retry_backoff
+        # A worker refreshes its claim when it retries, so it must retry before the claim is considered abandoned
+        self.retry_backoff_max = min(retry_backoff_max, claim_timeout / 2)
+        self.instance_id = instance_id
+        self._queue: "queue.Queue[IngestionItem]" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._last_recovery = 0.0
+        # Monotonic time before which a consumer does not retry its failed batch, only touched by its worker
+        self._retry_at = {}
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "enqueued": 0,
+            "dropped": 0,
+            "processed": 0,
+            "invalid": 0,
+            "store_flushes": 0,
+            "store_failures": 0,
+            "store_rejections": 0,
+            "dead_lettered": 0,
+            "requeued": 0,
+            "recovered": 0,
+            "enqueue_wait_seconds_total": 0.0,
+            "enqueue_wait_seconds_max": 0.0,
+        }
+
+    def submit(self, item: IngestionItem, timeout: float = 0.0) -> bool:
+        """
+        Put an item to the ingestion queue.
+        Parameters:
+            item (IngestionItem): Raw MQTT payload or a batch of validated data.
+            timeout (float): How long to block while the queue is full, 0 to not block at all.
+        Returns:
+            bool: True if the item is queued, False if it was dropped because the queue is full.
+        """
+        started = time.monotonic()
+        try:
+            if timeout > 0:
+                self._queue.put(item, timeout=timeout)
+            else:
+                self._queue.put_nowait(item)
+            queued = True
+        except queue.Full:
+            queued = False
+        waited = time.monotonic() - started
+        with self._metrics_lock:
+            self._metrics["enqueued" if queued else "dropped"] += 1
+            self._metrics["enqueue_wait_seconds_total"] += waited
+            self._metrics["enqueue_wait_seconds_max"] = max(self._metrics["enqueue_wait_seconds_max"], waited)
+        if not queued:
+            logging.warning("Ingestion queue is full, dropping data")
+        return queued
+
+    def metrics(self) -> dict:
+        """Counters of the pipeline together with the current queue depth."""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_size"] = self._queue.maxsize
+        try:
+            metrics["dead_letter_depth"] = self.buffer.dead_letter_length()
+        except Exception as e:
+            logging.error(f"Failed to read the dead-letter depth: {e}")
+            metrics["dead_letter_depth"] = None
+        return metrics
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(index,), name=f"ingestion-worker-{index}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Process everything that is already queued and stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _worker(self, index: int):
+        # A stable id lets a restarted hub pick up the batch it had in flight
+        consumer_id = f"{self.instance_id}:{index}"
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = []
+            if item is None:
+                return
+            try:
+                self._process(item)
+                self._flush(consumer_id)
+                self._recover_stale()
+            except Exception as e:
+                logging.error(f"Error processing ingestion item: {e}")
+
+    def _process(self, item: IngestionItem):
+        if isinstance(item, bytes):
+            processed_agent_data_batch = self._parse(item)
+        else:
+            processed_agent_data_batch = item
+        if not processed_agent_data_batch:
+            return
+        self.buffer.push([data.model_dump_json() for data in processed_agent_data_batch])
+        with self._metrics_lock:
+            self._metrics["processed"] += len(processed_agent_data_batch)
+
+    def _flush(self, consumer_id: str):
+        """
+        Send every due batch to the Store, stop at the first failure and retry it once its backoff is over.
+        Rejected batches are dead-lettered and flushing goes on.
+        """
+        if time.monotonic() < self._retry_at.get(consumer_id, 0.0):
+            return
+        while True:
+            items = self.buffer.claim_batch(consumer_id, self.batch_size, self.flush_max_age)
+            if not items:
+                return
+            # Items were validated before they were pushed and are stored as JSON, so the joined
+            # array is the request body as is, it is only parsed again to explain a rejection
+            body = b"[" + b",".join(items) + b"]"
+            try:
+                saved = self.store_gateway.save_encoded(body)
+            except StoreRejectedError as e:
+                with self._metrics_lock:
+                    self._metrics["store_rejections"] += 1
+                self._dead_letter(consumer_id, self._rejection_reason(body, e))
+                continue
+            with self._metrics_lock:
+                self._metrics["store_flushes" if saved else "store_failures"] += 1
+            if saved:
+                self.buffer.ack(consumer_id)
+                self._retry_at.pop(consumer_id, None)
+                continue
+            attempts = self.buffer.record_failure(consumer_id)
+            delay = min(self.retry_backoff * 2 ** min(attempts - 1, 32), self.retry_backoff_max)
+            self._retry_at[consumer_id] = time.monotonic() + delay
+            logging.warning(f"Failed to save a batch of {len(items)} items {attempts} times, retrying in {delay:.1f} s")
+            return
+
+    @staticmethod
+    def _rejection_reason(body: bytes, error: StoreRejectedError) -> str:
+        try:
+            processed_agent_data_batch_adapter.validate_json(body)
+        except ValueError as e:
+            return f"{error}, the batch is not valid processed agent data: {e}"
+        return str(error)
+
+    def _dead_letter(self, consumer_id: str, reason: str):
+        moved = self.buffer.dead_letter(consumer_id)
+        logging.error(f"Moved a batch of {moved} items to the dead-letter list: {reason}")
+        with self._metrics_lock:
+            self._metrics["dead_lettered"] += moved
+
+    def requeue_dead_letter(self) -> int:
+        """Move every dead-lettered item back to the buffer to be sent to the Store again."""
+        requeued = self.buffer.requeue_dead_letter()
+        if requeued:
+            logging.warning(f"Returned {requeued} dead-lettered items to the buffer")
+            with self._metrics_lock:
+                self._metrics["requeued"] += requeued
+        return requeued
+
+    def _recover_stale(self):
+        now = time.monotonic()
+        if now - self._last_recovery < self.claim_timeout:
+            return
+        self._last_recovery = now
+        recovered = self.buffer.recover_stale(self.claim_timeout)
+        if recovered:
+            logging.warning(f"Returned {recovered} abandoned in-flight items to the buffer")
+            with self._metrics_lock:
+                self._metrics["recovered"] += recovered
+
+    def _parse(self, payload: bytes) -> List[ProcessedAgentData]:
+        try:
+            # Edge sends a binary batch, a single ProcessedAgentData or a JSON batch of them
+            if is_binary(payload):
+                return decode_processed_agent_data(payload)
+            if payload.lstrip().startswith(b"["):
+                return processed_agent_data_batch_adapter.validate_json(payload, strict=True)
+            return [ProcessedAgentData.model_validate_json(payload, strict=True)]
+        except ValueError as e:
+            with self._metrics_lock:
+                self._metrics["invalid"] += 1
+            logging.info(f"Error processing MQTT message: {e}")
+            return []
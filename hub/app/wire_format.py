@@ -0,0 +1,56 @@
+import struct
+from datetime import datetime, timezone
+from typing import List
+
+from app.entities.agent_data import AccelerometerData, AgentData, GpsData
+from app.entities.processed_agent_data import ProcessedAgentData
+
+# Binary payloads start with this header, JSON payloads start with "{" or "[" so they are told apart
+# by their first bytes: magic, format version, payload kind, number of samples N. The header is
+# followed by the columns x, y, z as float32[N], latitude, longitude and timestamp (POSIX seconds,
+# UTC) as float64[N] and road state codes as uint8[N] indexing ROAD_STATES. Must match the edge.
+MAGIC = b"RV"
+VERSION = 1
+KIND_PROCESSED_AGENT_DATA = 2
+HEADER = struct.Struct("<2sBBI")
+ROAD_STATES = ("smooth", "bump", "pothole")
+
+
+def is_binary(payload: bytes) -> bool:
+    return payload[:2] == MAGIC
+
+
+def decode_processed_agent_data(payload: bytes) -> List[ProcessedAgentData]:
+    """
+    Decode a binary processed agent data payload sent by the edge.
+    Parameters:
+        payload (bytes): Binary payload.
+    Returns:
+        processed_agent_data_batch (List[ProcessedAgentData]): Decoded data, built without validation
+            since every value is already typed by the binary layout.
+    """
+    if len(payload) < HEADER.size:
+        raise ValueError("Binary payload is shorter than its header")
+    magic, version, kind, n = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION or kind != KIND_PROCESSED_AGENT_DATA:
+        raise ValueError(f"Unsupported binary payload (version {version}, kind {kind})")
+    columns = struct.Struct(f"<{3 * n}f{3 * n}d{n}B")
+    if len(payload) != HEADER.size + columns.size:
+        raise ValueError(f"Binary payload of {len(payload)} bytes does not hold {n} samples")
+    values = columns.unpack_from(payload, HEADER.size)
+    x, y, z = values[0:n], values[n:2 * n], values[2 * n:3 * n]
+    latitude, longitude, timestamp = values[3 * n:4 * n], values[4 * n:5 * n], values[5 * n:6 * n]
+    codes = values[6 * n:]
+    if any(code >= len(ROAD_STATES) for code in codes):
+        raise ValueError("Unknown road state code in binary payload")
+    return [
+        ProcessedAgentData.model_construct(
+            road_state=ROAD_STATES[codes[i]],
+            agent_data=AgentData.model_construct(
+                accelerometer=AccelerometerData.model_construct(x=x[i], y=y[i], z=z[i]),
+                gps=GpsData.model_construct(latitude=latitude[i], longitude=longitude[i]),
+                timestamp=datetime.fromtimestamp(timestamp[i], timezone.utc).replace(tzinfo=None),
+            ),
+        )
+        for i in range(n)
+    ]
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark of flushing a batch from the buffer to the Store, IngestionPipeline._flush.
+
+The buffer holds every item as JSON. Compares the old flush (parse the joined items into models,
+then item.json() -> json.loads per item and json.dumps of the list as done by requests' json=), the
+previous one (parse the joined items, then a single TypeAdapter.dump_json in save_data) and the current
+one that posts the joined items as they are. Each path runs the real pipeline and StoreApiAdapter with
+an in-memory buffer and a session that answers 200 without sending, so only the hub side is measured.
+
+Run from the hub directory:
+    python -m benchmarks.store_serialization_benchmark
+"""
+import json
+import timeit
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from app.adapters.store_api_adapter import StoreApiAdapter
+from app.entities.processed_agent_data import ProcessedAgentData, processed_agent_data_batch_adapter
+from app.interfaces.buffer_gateway import BufferGateway
+from app.usecases.ingestion_pipeline import IngestionPipeline
+
+BATCH_SIZES = (20, 200, 2000)
+
+
+def make_items(size: int) -> List[bytes]:
+    started = datetime(2024, 3, 1, 12, 0, 0)
+    return [
+        ProcessedAgentData.model_validate({
+            "road_state": "smooth",
+            "agent_data": {
+                "accelerometer": {"x": -17.0 + i, "y": 4.0 - i, "z": 16516.0},
+                "gps": {"latitude": 50.450386085935094 + i * 1e-6, "longitude": 30.524547100067142},
+                "timestamp": started + timedelta(milliseconds=100 * i),
+            },
+        }).model_dump_json().encode()
+        for i in range(size)
+    ]
+
+
+class OneBatchBuffer(BufferGateway):
+    """Hands out the same batch once per flush, like a buffer holding exactly one due batch."""
+
+    def __init__(self, items: List[bytes]):
+        self.items = items
+        self.claimed = False
+
+    def push(self, items):
+        return len(items)
+
+    def claim_batch(self, consumer_id, batch_size, max_age):
+        if self.claimed:
+            return []
+        self.claimed = True
+        return self.items
+
+    def ack(self, consumer_id):
+        pass
+
+    def record_failure(self, consumer_id):
+        return 1
+
+    def dead_letter(self, consumer_id):
+        return 0
+
+    def requeue_dead_letter(self):
+        return 0
+
+    def dead_letter_length(self):
+        return 0
+
+    def recover_stale(self, claim_timeout):
+        return 0
+
+
+def make_store_adapter(adapter_class=StoreApiAdapter) -> StoreApiAdapter:
+    store_adapter = adapter_class(api_base_url="http://store")
+    store_adapter.session.post = lambda url, data, headers, timeout: SimpleNamespace(status_code=200, text="")
+    return store_adapter
+
+
+class OldStoreApiAdapter(StoreApiAdapter):
+    def save_encoded(self, processed_agent_data_batch_json: bytes):
+        batch = processed_agent_data_batch_adapter.validate_json(processed_agent_data_batch_json)
+        with warnings.catch_warnings():
+            # .json() is the deprecated pydantic v1 API
+            warnings.simplefilter("ignore")
+            data = [json.loads(item.json()) for item in batch]
+        return super().save_encoded(json.dumps(data).encode("utf-8"))
+
+
+class PreviousStoreApiAdapter(StoreApiAdapter):
+    def save_encoded(self, processed_agent_data_batch_json: bytes):
+        batch = processed_agent_data_batch_adapter.validate_json(processed_agent_data_batch_json)
+        return super().save_encoded(processed_agent_data_batch_adapter.dump_json(batch))
+
+
+def flush_path(store_adapter: StoreApiAdapter, items: List[bytes]):
+    buffer = OneBatchBuffer(items)
+    pipeline = IngestionPipeline(buffer=buffer, store_gateway=store_adapter, batch_size=len(items))
+
+    def flush():
+        buffer.claimed = False
+        pipeline._flush("benchmark")
+
+    return flush
+
+
+def main():
+    adapters = [
+        ("validate + json.loads(item.json())", OldStoreApiAdapter),
+        ("validate + TypeAdapter.dump_json", PreviousStoreApiAdapter),
+        ("joined buffer items", StoreApiAdapter),
+    ]
+    for size in BATCH_SIZES:
+        items = make_items(size)
+        number = max(1, 20000 // size)
+        print(f"batch size {size} ({number} runs)")
+        baseline = None
+        for name, adapter_class in adapters:
+            flush = flush_path(make_store_adapter(adapter_class), items)
+            seconds = min(timeit.repeat(flush, number=number, repeat=5)) / number
+            baseline = baseline or seconds
+            print(f"  {name:<40} {seconds * 1e6:10.1f} us/batch  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import socket
 
 
 def try_parse_int(value: str):
@@ -8,6 +9,13 @@ def try_parse_int(value: str):
         return None
 
 
+def try_parse_float(value: str):
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
 # Configuration for the Store API
 STORE_API_HOST = os.environ.get("STORE_API_HOST") or "localhost"
 STORE_API_PORT = try_parse_int(os.environ.get("STORE_API_PORT")) or 8000
@@ -19,6 +27,32 @@ REDIS_PORT = try_parse_int(os.environ.get("REDIS_PORT")) or 6379
 
 # Configure for hub logic
 BATCH_SIZE = try_parse_int(os.environ.get("BATCH_SIZE")) or 20
+# Bounded queue between MQTT/HTTP ingestion and the workers that talk to Redis and the Store
+INGEST_QUEUE_SIZE = try_parse_int(os.environ.get("INGEST_QUEUE_SIZE")) or 1000
+INGEST_WORKERS = try_parse_int(os.environ.get("INGEST_WORKERS")) or 1
+# Seconds the MQTT callback may block on a full queue before the message is dropped
+INGEST_QUEUE_PUT_TIMEOUT = try_parse_float(os.environ.get("INGEST_QUEUE_PUT_TIMEOUT")) or 1.0
+# Seconds after which a partial batch is flushed to the Store, and how often workers check for it
+FLUSH_MAX_AGE = try_parse_float(os.environ.get("FLUSH_MAX_AGE")) or 5.0
+FLUSH_INTERVAL = try_parse_float(os.environ.get("FLUSH_INTERVAL")) or 1.0
+# Seconds after which an unacknowledged batch of a dead hub replica is returned to the buffer
+CLAIM_TIMEOUT = try_parse_float(os.environ.get("CLAIM_TIMEOUT")) or 60.0
+# Seconds a worker waits before retrying a batch that failed with a 5xx or connection error, doubled
+# after every failed attempt up to FLUSH_RETRY_BACKOFF_MAX. Such batches are retried until they are saved,
+# only batches the Store rejects with a 4xx are moved to the dead-letter list
+FLUSH_RETRY_BACKOFF = try_parse_float(os.environ.get("FLUSH_RETRY_BACKOFF")) or 1.0
+FLUSH_RETRY_BACKOFF_MAX = try_parse_float(os.environ.get("FLUSH_RETRY_BACKOFF_MAX")) or 30.0
+# Must be unique per hub replica and stable across restarts
+HUB_INSTANCE_ID = os.environ.get("HUB_INSTANCE_ID") or socket.gethostname()
+
+# HTTP client: connection pool, timeouts in seconds, retries with jittered backoff, gzip request bodies
+HTTP_POOL_SIZE = try_parse_int(os.environ.get("HTTP_POOL_SIZE")) or 10
+HTTP_CONNECT_TIMEOUT = try_parse_float(os.environ.get("HTTP_CONNECT_TIMEOUT")) or 3.0
+HTTP_READ_TIMEOUT = try_parse_float(os.environ.get("HTTP_READ_TIMEOUT")) or 30.0
+HTTP_RETRIES = try_parse_int(os.environ.get("HTTP_RETRIES")) or 3
+HTTP_BACKOFF_FACTOR = try_parse_float(os.environ.get("HTTP_BACKOFF_FACTOR")) or 0.2
+HTTP_BACKOFF_JITTER = try_parse_float(os.environ.get("HTTP_BACKOFF_JITTER")) or 0.2
+HTTP_GZIP = (os.environ.get("HTTP_GZIP") or "false").lower() in ("1", "true", "yes")
 
 # MQTT
 MQTT_BROKER_HOST = os.environ.get("MQTT_BROKER_HOST") or "localhost"
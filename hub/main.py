@@ -1,11 +1,19 @@
 import logging
+from contextlib import asynccontextmanager
 from typing import List
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from redis import Redis
 import paho.mqtt.client as mqtt
+from app.adapters.redis_buffer import RedisBuffer
 from app.adapters.store_api_adapter import StoreApiAdapter
 from app.entities.processed_agent_data import ProcessedAgentData
+from app.gzip_request_middleware import GzipRequestMiddleware
+from app.usecases.ingestion_pipeline import IngestionPipeline
 from config import (STORE_API_BASE_URL, REDIS_HOST, REDIS_PORT, BATCH_SIZE,
+                    INGEST_QUEUE_SIZE, INGEST_WORKERS, INGEST_QUEUE_PUT_TIMEOUT,
+                    FLUSH_MAX_AGE, FLUSH_INTERVAL, CLAIM_TIMEOUT, FLUSH_RETRY_BACKOFF, FLUSH_RETRY_BACKOFF_MAX,
+                    HUB_INSTANCE_ID, HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES,
+                    HTTP_BACKOFF_FACTOR, HTTP_BACKOFF_JITTER, HTTP_GZIP,
                     MQTT_TOPIC, MQTT_BROKER_HOST, MQTT_BROKER_PORT)
 
 # Configure logging settings
@@ -22,25 +30,71 @@ logging.basicConfig(
 redis_client = Redis(host=REDIS_HOST, port=REDIS_PORT)
 
 # Create an instance of the StoreApiAdapter using the configuration
-store_adapter = StoreApiAdapter(api_base_url=STORE_API_BASE_URL)
-# Create an instance of the AgentMQTTAdapter using the configuration
+store_adapter = StoreApiAdapter(
+    api_base_url=STORE_API_BASE_URL,
+    pool_size=max(HTTP_POOL_SIZE, INGEST_WORKERS),
+    timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+    retries=HTTP_RETRIES,
+    backoff_factor=HTTP_BACKOFF_FACTOR,
+    backoff_jitter=HTTP_BACKOFF_JITTER,
+    use_gzip=HTTP_GZIP,
+)
+# Workers buffer data in Redis and flush it to the Store off the MQTT and HTTP threads,
+# full batches right away and partial ones after FLUSH_MAX_AGE seconds
+ingestion_pipeline = IngestionPipeline(
+    buffer=RedisBuffer(redis_client),
+    store_gateway=store_adapter,
+    batch_size=BATCH_SIZE,
+    queue_size=INGEST_QUEUE_SIZE,
+    workers=INGEST_WORKERS,
+    flush_max_age=FLUSH_MAX_AGE,
+    flush_interval=FLUSH_INTERVAL,
+    claim_timeout=CLAIM_TIMEOUT,
+    retry_backoff=FLUSH_RETRY_BACKOFF,
+    retry_backoff_max=FLUSH_RETRY_BACKOFF_MAX,
+    instance_id=HUB_INSTANCE_ID,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop receiving MQTT messages and process what is already queued
+    client.loop_stop()
+    ingestion_pipeline.stop()
+    store_adapter.session.close()
+
+
 # FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+# Edge may send gzip compressed request bodies
+app.add_middleware(GzipRequestMiddleware)
 
 
 @app.post("/processed_agent_data/")
 async def save_processed_agent_data(processed_agent_data: ProcessedAgentData):
-    print(processed_agent_data)
-    redis_client.lpush("processed_agent_data", processed_agent_data.model_dump_json())
-    processed_agent_data_batch: List[ProcessedAgentData] = []
-    if redis_client.llen("processed_agent_data") >= BATCH_SIZE:
-        for _ in range(BATCH_SIZE):
-            processed_agent_data = ProcessedAgentData.model_validate_json(redis_client.lpop("processed_agent_data"))
-            processed_agent_data_batch.append(processed_agent_data)
-        if not store_adapter.save_data(processed_agent_data_batch=processed_agent_data_batch):
-            return {"status": "error"}
+    if not ingestion_pipeline.submit([processed_agent_data]):
+        raise HTTPException(status_code=503, detail="Ingestion queue is full")
     return {"status": "ok"}
 
+
+@app.post("/processed_agent_data/batch/")
+async def save_processed_agent_data_batch(processed_agent_data_batch: List[ProcessedAgentData]):
+    if processed_agent_data_batch and not ingestion_pipeline.submit(processed_agent_data_batch):
+        raise HTTPException(status_code=503, detail="Ingestion queue is full")
+    return {"status": "ok"}
+
+
+@app.post("/dead_letter/requeue")
+def requeue_dead_letter():
+    # Blocking Redis calls, so FastAPI runs this endpoint in its thread pool
+    return {"requeued": ingestion_pipeline.requeue_dead_letter()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return {"ingestion": ingestion_pipeline.metrics()}
+
 # MQTT
 client = mqtt.Client()
 
@@ -54,23 +108,9 @@ def on_connect(client, userdata, flags, rc):
 
 
 def on_message(client, userdata, msg):
-    batch_data = None
-    try:
-        payload: str = msg.payload.decode("utf-8")
-
-        # Create ProcessedAgentData instance with the received data
-        processed_agent_data = ProcessedAgentData.model_validate_json(payload, strict=True)
-        redis_client.lpush("processed_agent_data", processed_agent_data.model_dump_json())
-        processed_agent_data_batch: List[ProcessedAgentData] = []
-        if redis_client.llen("processed_agent_data") >= BATCH_SIZE:
-            for _ in range(BATCH_SIZE):
-                processed_agent_data = ProcessedAgentData.model_validate_json(redis_client.lpop("processed_agent_data"))
-                processed_agent_data_batch.append(processed_agent_data)
-            if not store_adapter.save_data(processed_agent_data_batch=processed_agent_data_batch):
-                return {"status": "error"}
-        return {"status": "ok"}
-    except Exception as e:
-        logging.info(f"Error processing MQTT message: {e}")
+    # Only enqueue here, parsing and all Redis/Store I/O happen on the ingestion workers.
+    # Blocking on a full queue stops reading from the socket, so the broker sees backpressure.
+    ingestion_pipeline.submit(msg.payload, timeout=INGEST_QUEUE_PUT_TIMEOUT)
 
 
 # Connect
@@ -79,4 +119,5 @@ client.on_message = on_message
 client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT)
 
 # Start
+ingestion_pipeline.start()
 client.loop_start()
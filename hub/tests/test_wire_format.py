@@ -0,0 +1,58 @@
+import struct
+from datetime import datetime
+
+import pytest
+
+from app.wire_format import HEADER, KIND_PROCESSED_AGENT_DATA, MAGIC, VERSION, decode_processed_agent_data, is_binary
+
+
+def encode(samples, codes, kind=KIND_PROCESSED_AGENT_DATA):
+    """Processed agent data payload as the edge packs it: columns of (x, y, z, latitude, longitude, timestamp)."""
+    n = len(samples)
+    columns = list(zip(*samples)) if samples else [()] * 6
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, kind, n),
+        *(struct.pack(f"<{n}f", *column) for column in columns[:3]),
+        *(struct.pack(f"<{n}d", *column) for column in columns[3:]),
+        bytes(codes),
+    ))
+
+
+def test_decode_round_trip():
+    samples = [
+        (-17.0, 4.5, 16516.0, 50.450386085935094, 30.524547100067142, 1709294400.25),
+        (1.0, -1500.5, 0.0, -33.8688, 151.2093, 1709294400.5),
+    ]
+    batch = decode_processed_agent_data(encode(samples, [2, 1]))
+    assert [data.road_state for data in batch] == ["pothole", "bump"]
+    first = batch[0].agent_data
+    assert (first.accelerometer.x, first.accelerometer.y, first.accelerometer.z) == (-17.0, 4.5, 16516.0)
+    assert (first.gps.latitude, first.gps.longitude) == (50.450386085935094, 30.524547100067142)
+    # Timestamps are naive UTC, as the JSON payloads are stored
+    assert first.timestamp == datetime(2024, 3, 1, 12, 0, 0, 250000)
+    # The decoded models serialize like validated ones
+    assert batch[1].model_dump_json() == (
+        '{"road_state":"bump","agent_data":{"accelerometer":{"x":1.0,"y":-1500.5,"z":0.0},'
+        '"gps":{"latitude":-33.8688,"longitude":151.2093},"timestamp":"2024-03-01T12:00:00.500000"}}'
+    )
+
+
+def test_decode_empty_payload():
+    assert decode_processed_agent_data(encode([], [])) == []
+
+
+def test_is_binary():
+    assert is_binary(encode([], []))
+    assert not is_binary(b'[{"road_state": "smooth"}]')
+
+
+@pytest.mark.parametrize("payload", [
+    MAGIC,
+    encode([(0.0,) * 6], [0], kind=1),
+    encode([(0.0,) * 6], [0])[:-1],
+    encode([(0.0,) * 6], [3]),
+    HEADER.pack(MAGIC, VERSION + 1, KIND_PROCESSED_AGENT_DATA, 0),
+])
+def test_decode_rejects_malformed_payloads(payload):
+    with pytest.raises(ValueError):
+        decode_processed_agent_data(payload)
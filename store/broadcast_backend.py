@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable
+
+MessageHandler = Callable[[bytes], None]
+
+
+class BroadcastBackend(ABC):
+    """Delivers messages published by any store worker to the message handler of every worker."""
+
+    @abstractmethod
+    async def start(self, on_message: MessageHandler):
+        pass
+
+    @abstractmethod
+    async def publish(self, message: bytes):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class InMemoryBroadcastBackend(BroadcastBackend):
+    """Delivers messages to the handler of this process only, for a single worker and for tests."""
+
+    def __init__(self):
+        self._on_message = None
+
+    async def start(self, on_message: MessageHandler):
+        self._on_message = on_message
+
+    async def publish(self, message: bytes):
+        if self._on_message is not None:
+            self._on_message(message)
+
+
+class RedisBroadcastBackend(BroadcastBackend):
+    """Redis pub/sub channel shared by all store workers and replicas."""
+
+    def __init__(self, host: str, port: int, channel: str, reconnect_delay: float = 1.0):
+        # Imported here so that redis is only required with this backend
+        from redis.asyncio import Redis
+
+        self.redis = Redis(host=host, port=port)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._listener_task = None
+
+    async def start(self, on_message: MessageHandler):
+        self._listener_task = asyncio.create_task(self._listen(on_message))
+
+    async def publish(self, message: bytes):
+        await self.redis.publish(self.channel, message)
+
+    async def _listen(self, on_message: MessageHandler):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Redis broadcast subscription failed, reconnecting: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+        await self.redis.aclose()
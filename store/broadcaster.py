@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import List, Literal, Optional, Set
+
+from pydantic import TypeAdapter
+from starlette.websockets import WebSocket
+
+from domain.processed_agent_data_in_db import ProcessedAgentDataInDB
+from domain.subscription_filter import SubscriptionFilter
+
+OverflowPolicy = Literal["drop_oldest", "disconnect"]
+processed_agent_data_in_db_list_adapter = TypeAdapter(List[ProcessedAgentDataInDB])
+
+
+class Subscriber:
+    """A WebSocket client with its own bounded queue of messages, a task sending them and an optional filter."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender_task = None
+        self.filter: Optional[SubscriptionFilter] = None
+        self.smooth_rows_seen = 0
+
+    def set_filter(self, subscription_filter: Optional[SubscriptionFilter]):
+        self.filter = subscription_filter
+        self.smooth_rows_seen = 0
+
+    def accepts(self, row: ProcessedAgentDataInDB) -> bool:
+        subscription_filter = self.filter
+        if subscription_filter.road_state and row.road_state not in subscription_filter.road_state:
+            return False
+        if subscription_filter.min_latitude is not None and row.latitude < subscription_filter.min_latitude:
+            return False
+        if subscription_filter.max_latitude is not None and row.latitude > subscription_filter.max_latitude:
+            return False
+        if subscription_filter.min_longitude is not None and row.longitude < subscription_filter.min_longitude:
+            return False
+        if subscription_filter.max_longitude is not None and row.longitude > subscription_filter.max_longitude:
+            return False
+        if subscription_filter.downsample > 1 and row.road_state == "smooth":
+            self.smooth_rows_seen += 1
+            return (self.smooth_rows_seen - 1) % subscription_filter.downsample == 0
+        return True
+
+
+class Broadcaster:
+    """
+    Fans messages out to WebSocket subscribers. publish() never waits on clients: every subscriber has
+    a bounded queue drained by its own sender task, so a slow client only falls behind by itself. When a
+    queue is full either the oldest queued message is dropped or the client is disconnected.
+    """
+
+    def __init__(self, queue_size: int, overflow_policy: OverflowPolicy):
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.subscribers: Set[Subscriber] = set()
+        self.dropped_messages = 0
+        self.disconnected_subscribers = 0
+
+    def subscribe(self, websocket: WebSocket) -> Subscriber:
+        subscriber = Subscriber(websocket, self.queue_size)
+        subscriber.sender_task = asyncio.create_task(self._send_loop(subscriber))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        if subscriber.sender_task is not None:
+            subscriber.sender_task.cancel()
+
+    def publish(self, message: bytes):
+        """
+        Queue a JSON array of rows for every subscriber. Subscribers without a filter get the message
+        as it is. The rows are only decoded, once per message, when a subscriber has a filter, which gets
+        an array joined from the rows it accepts and nothing if it accepts none.
+        """
+        if not self.subscribers:
+            return
+        all_rows_message = message.decode()
+        rows = encoded_rows = None
+        for subscriber in list(self.subscribers):
+            if subscriber.filter is None:
+                self._enqueue(subscriber, all_rows_message)
+                continue
+            if rows is None:
+                rows = processed_agent_data_in_db_list_adapter.validate_json(message)
+                encoded_rows = [row.model_dump_json() for row in rows]
+            accepted = [encoded for row, encoded in zip(rows, encoded_rows) if subscriber.accepts(row)]
+            if accepted:
+                self._enqueue(subscriber, "[" + ",".join(accepted) + "]")
+
+    def send(self, subscriber: Subscriber, message: str):
+        """Queue a message for a single subscriber, e.g. a reply to its subscription message."""
+        if subscriber in self.subscribers:
+            self._enqueue(subscriber, message)
+
+    def _enqueue(self, subscriber: Subscriber, message: str):
+        try:
+            subscriber.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.overflow_policy == "disconnect":
+            self.disconnected_subscribers += 1
+            self.unsubscribe(subscriber)
+            asyncio.create_task(self._close(subscriber))
+            return
+        subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(message)
+        self.dropped_messages += 1
+
+    async def _send_loop(self, subscriber: Subscriber):
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                await subscriber.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.info(f"Stopped sending to WebSocket subscriber: {e}")
+            self.subscribers.discard(subscriber)
+
+    @staticmethod
+    async def _close(subscriber: Subscriber):
+        try:
+            # 1013: try again later
+            await subscriber.websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def close(self):
+        for subscriber in list(self.subscribers):
+            self.unsubscribe(subscriber)
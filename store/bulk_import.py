@@ -0,0 +1,88 @@
+import csv
+from datetime import datetime
+from typing import AsyncIterator, List, Tuple
+
+from domain.processed_agent_data import ProcessedAgentData
+
+# Columns filled by COPY, in the order of the record tuples
+COPY_COLUMNS = ("road_state", "x", "y", "z", "latitude", "longitude", "timestamp")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+
+class BulkImportError(ValueError):
+    """Raised for a line of the import body that cannot be parsed."""
+
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"Line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def processed_agent_data_to_record(processed_agent_data: ProcessedAgentData) -> Tuple:
+    agent_data = processed_agent_data.agent_data
+    return (
+        processed_agent_data.road_state,
+        agent_data.accelerometer.x,
+        agent_data.accelerometer.y,
+        agent_data.accelerometer.z,
+        agent_data.gps.latitude,
+        agent_data.gps.longitude,
+        agent_data.timestamp,
+    )
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a streamed body into numbered non-empty lines without reading it all into memory."""
+    line_number = 0
+    rest = b""
+    async for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if rest.strip():
+        yield line_number + 1, rest
+
+
+def parse_ndjson_line(line_number: int, line: bytes) -> Tuple:
+    """Parse a line holding one ProcessedAgentData JSON object, the same shape the POST endpoint takes."""
+    try:
+        return processed_agent_data_to_record(ProcessedAgentData.model_validate_json(line))
+    except ValueError as e:
+        raise BulkImportError(line_number, str(e))
+
+
+def parse_csv_line(line_number: int, line: bytes, header: List[str]) -> Tuple:
+    """Parse a CSV line with the columns named in the header, which must cover COPY_COLUMNS."""
+    try:
+        values = dict(zip(header, next(csv.reader([line.decode("utf-8")]))))
+        timestamp = datetime.fromisoformat(values["timestamp"]).replace(tzinfo=None)
+        return (
+            values["road_state"],
+            float(values["x"]),
+            float(values["y"]),
+            float(values["z"]),
+            float(values["latitude"]),
+            float(values["longitude"]),
+            timestamp,
+        )
+    except (KeyError, ValueError, UnicodeDecodeError) as e:
+        raise BulkImportError(line_number, f"invalid CSV row: {e}")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[Tuple]:
+    """Yield COPY records from an NDJSON or CSV (with a header line) request body."""
+    is_csv = content_type.split(";")[0].strip().lower() in CSV_CONTENT_TYPES
+    header = None
+    async for line_number, line in iter_lines(chunks):
+        if not is_csv:
+            yield parse_ndjson_line(line_number, line)
+        elif header is None:
+            header = [name.strip() for name in next(csv.reader([line.decode("utf-8")]))]
+            missing = set(COPY_COLUMNS) - set(header)
+            if missing:
+                raise BulkImportError(line_number, f"CSV header misses columns {sorted(missing)}")
+        else:
+            yield parse_csv_line(line_number, line, header)
+
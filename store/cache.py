@@ -0,0 +1,222 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional, Tuple, Union
+
+# Seconds a loader holds the lease of a missing key, values of slower loads are returned but not cached
+LEASE_TTL = 10.0
+
+
+class CacheBackend(ABC):
+    """Stores serialized values with a time to live in seconds."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        pass
+
+    @abstractmethod
+    async def lease(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Reserve a missing key for a loader with a token stored in place of the value. Deleting the key
+        drops the lease. Returns None when the key already holds a value or another lease.
+        """
+        pass
+
+    @abstractmethod
+    async def set_leased(self, key: str, token: str, value: bytes, ttl: float) -> bool:
+        """Store the value only while the key still holds the lease token, i.e. it was not deleted since."""
+        pass
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]):
+        pass
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str):
+        pass
+
+    def size(self) -> Optional[int]:
+        return None
+
+    async def close(self):
+        pass
+
+
+class InMemoryCache(CacheBackend):
+    """Per process cache evicting the least recently used entry once max_entries are stored."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        # Values are bytes, leases are str tokens held in the entry of the key they reserve
+        self._entries: "OrderedDict[str, Tuple[float, Union[bytes, str]]]" = OrderedDict()
+
+    def _entry(self, key: str) -> Optional[Union[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._entry(key)
+        if not isinstance(value, bytes):
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def lease(self, key: str, ttl: float) -> Optional[str]:
+        if self._entry(key) is not None:
+            return None
+        token = uuid.uuid4().hex
+        await self.set(key, token, ttl)
+        return token
+
+    async def set_leased(self, key: str, token: str, value: bytes, ttl: float) -> bool:
+        if self._entry(key) != token:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def set(self, key: str, value: Union[bytes, str], ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, keys: Iterable[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+# Leases are stored as this marker and a token, cached values are JSON and never start with a NUL byte
+REDIS_LEASE_MARKER = b"\x00lease:"
+
+# KEYS: cache key; ARGV: lease, value, ttl in ms
+SET_LEASED_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by all store workers, so an invalidation in one worker is seen by the others."""
+
+    def __init__(self, host: str, port: int, prefix: str = "store:cache:"):
+        # Imported here so that redis is only required with this backend
+        from redis.asyncio import Redis
+
+        self.redis = Redis(host=host, port=port)
+        self.prefix = prefix
+        self._set_leased = self.redis.register_script(SET_LEASED_SCRIPT)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.redis.get(self.prefix + key)
+        if value is None or value.startswith(REDIS_LEASE_MARKER):
+            return None
+        return value
+
+    async def lease(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if not await self.redis.set(self.prefix + key, REDIS_LEASE_MARKER + token.encode(), px=max(int(ttl * 1000), 1),
+                                    nx=True):
+            return None
+        return token
+
+    async def set_leased(self, key: str, token: str, value: bytes, ttl: float) -> bool:
+        return bool(await self._set_leased(
+            keys=[self.prefix + key], args=[REDIS_LEASE_MARKER + token.encode(), value, max(int(ttl * 1000), 1)]
+        ))
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, keys: Iterable[str]):
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            await self.redis.delete(*keys)
+
+    async def delete_prefix(self, prefix: str):
+        # SCAN walks the keyspace in steps instead of blocking Redis like KEYS would
+        keys = []
+        async for key in self.redis.scan_iter(match=self.prefix + prefix + "*", count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                await self.redis.unlink(*keys)
+                keys = []
+        if keys:
+            await self.redis.unlink(*keys)
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class ReadThroughCache:
+    """
+    Loads missing values through a loader and counts hits and misses. Values of None are not cached.
+    A loader leases the key before it reads, and an invalidation in between drops the lease, so a load
+    that read before a write committed does not cache its stale value after the write invalidated the key.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: str, ttl: float, loader: Callable[[], Awaitable[Optional[bytes]]]):
+        if self.backend is None:
+            return await loader()
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        token = await self.backend.lease(key, LEASE_TTL)
+        value = await loader()
+        if value is not None and token is not None:
+            await self.backend.set_leased(key, token, value, ttl)
+        return value
+
+    async def invalidate(self, keys: Iterable[str]):
+        if self.backend is not None:
+            await self.backend.delete(keys)
+
+    async def invalidate_prefix(self, prefix: str):
+        if self.backend is not None:
+            await self.backend.delete_prefix(prefix)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        snapshot = {
+            "enabled": self.backend is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if isinstance(self.backend, InMemoryCache):
+            snapshot["entries"] = self.backend.size()
+            snapshot["evictions"] = self.backend.evictions
+        return snapshot
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
@@ -14,3 +14,53 @@ POSTGRES_PORT = try_parse(int, os.environ.get("POSTGRES_PORT")) or 5432
 POSTGRES_USER = os.environ.get("POSTGRES_USER") or "user"
 POSTGRES_PASSWORD = os.environ.get("POSTGRES_PASS") or "pass"
 POSTGRES_DB = os.environ.get("POSTGRES_DB") or "test_db"
+
+# Connection pool of the store, sized for bursts of hub flushes
+DB_POOL_SIZE = try_parse(int, os.environ.get("DB_POOL_SIZE")) or 10
+DB_MAX_OVERFLOW = try_parse(int, os.environ.get("DB_MAX_OVERFLOW")) or 20
+DB_POOL_TIMEOUT = try_parse(float, os.environ.get("DB_POOL_TIMEOUT")) or 30.0
+DB_POOL_RECYCLE = try_parse(int, os.environ.get("DB_POOL_RECYCLE")) or 1800
+DB_POOL_PRE_PING = (os.environ.get("DB_POOL_PRE_PING") or "true").lower() in ("1", "true", "yes")
+# Prepared statements cached per connection by asyncpg
+DB_STATEMENT_CACHE_SIZE = try_parse(int, os.environ.get("DB_STATEMENT_CACHE_SIZE")) or 500
+
+# Number of records sent per COPY call by the bulk import endpoint
+IMPORT_CHUNK_SIZE = try_parse(int, os.environ.get("IMPORT_CHUNK_SIZE")) or 10000
+
+# Page size of the list endpoint
+LIST_DEFAULT_LIMIT = try_parse(int, os.environ.get("LIST_DEFAULT_LIMIT")) or 1000
+LIST_MAX_LIMIT = try_parse(int, os.environ.get("LIST_MAX_LIMIT")) or 10000
+
+# Bounding boxes spanning more grid rows are filtered by latitude/longitude only
+GRID_MAX_QUERY_ROWS = try_parse(int, os.environ.get("GRID_MAX_QUERY_ROWS")) or 200
+
+# Daily partitions of processed_agent_data: raw samples older than the retention are rolled up and dropped
+PARTITION_RETENTION_DAYS = try_parse(int, os.environ.get("PARTITION_RETENTION_DAYS")) or 30
+PARTITION_PRECREATE_DAYS = try_parse(int, os.environ.get("PARTITION_PRECREATE_DAYS")) or 2
+PARTITION_MAINTENANCE_INTERVAL = try_parse(float, os.environ.get("PARTITION_MAINTENANCE_INTERVAL")) or 3600
+
+# Road defect registry: detections of the same road state closer than the merge radius (metres) are one defect,
+# whose confidence is count / (count + DEFECT_CONFIDENCE_PRIOR)
+DEFECT_MERGE_RADIUS = try_parse(float, os.environ.get("DEFECT_MERGE_RADIUS")) or 10.0
+DEFECT_CONFIDENCE_PRIOR = try_parse(float, os.environ.get("DEFECT_CONFIDENCE_PRIOR")) or 2.0
+
+# WebSocket subscribers: messages queued per client, on overflow "drop_oldest" or "disconnect"
+WS_QUEUE_SIZE = try_parse(int, os.environ.get("WS_QUEUE_SIZE")) or 100
+WS_OVERFLOW_POLICY = os.environ.get("WS_OVERFLOW_POLICY") or "drop_oldest"
+
+# Delivery of inserted rows to WebSocket subscribers of every worker: "memory" (this process only) or "redis"
+BROADCAST_BACKEND = os.environ.get("BROADCAST_BACKEND") or "memory"
+BROADCAST_CHANNEL = os.environ.get("BROADCAST_CHANNEL") or "processed_agent_data"
+REDIS_HOST = os.environ.get("REDIS_HOST") or "localhost"
+REDIS_PORT = try_parse(int, os.environ.get("REDIS_PORT")) or 6379
+
+# Read-through cache of single rows and hot list queries: "memory" (per worker), "redis" (shared) or "none".
+# With several workers only the redis backend sees invalidations from other workers, otherwise entries
+# can be stale for up to their TTL in seconds.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND") or "memory"
+CACHE_MAX_ENTRIES = try_parse(int, os.environ.get("CACHE_MAX_ENTRIES")) or 10000
+CACHE_TTL = try_parse(float, os.environ.get("CACHE_TTL")) or 30.0
+CACHE_LIST_TTL = try_parse(float, os.environ.get("CACHE_LIST_TTL")) or 2.0
+
+# (id, road_state) pairs per UPDATE ... FROM (VALUES ...) statement, bounded by the bind parameter limit
+BULK_UPDATE_CHUNK_SIZE = try_parse(int, os.environ.get("BULK_UPDATE_CHUNK_SIZE")) or 5000
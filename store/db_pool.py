@@ -0,0 +1,51 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Counters of connection checkouts from the pool and how long requests waited for them."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkout wait times, including the pre-ping. The metrics are a class
+    attribute so that they survive the pool being recreated by the engine.
+    """
+
+    metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def snapshot(self) -> dict:
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_seconds_total": metrics.wait_seconds_total,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "wait_seconds_avg": metrics.wait_seconds_total / metrics.checkouts if metrics.checkouts else 0.0,
+        }
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from geo import grid_cell, grid_cells_around, grid_cells_near, haversine_distance
+
+# Namespace of the advisory locks taken per grid cell while defects are merged
+DEFECT_LOCK_NAMESPACE = 1001
+
+LOCK_CELLS_QUERY = text(
+    "SELECT pg_advisory_xact_lock(:namespace, cell) FROM unnest(CAST(:cells AS INTEGER[])) AS cell"
+)
+SELECT_DEFECTS_QUERY = text(
+    "SELECT id, road_state, latitude, longitude, sample_count, first_seen, last_seen "
+    "FROM road_defects WHERE cell_id = ANY(:cells)"
+)
+INSERT_DEFECT_QUERY = text(
+    "INSERT INTO road_defects (road_state, latitude, longitude, sample_count, confidence, first_seen, last_seen) "
+    "VALUES (:road_state, :latitude, :longitude, :sample_count, :confidence, :first_seen, :last_seen)"
+)
+DELETE_DEFECTS_QUERY = text("DELETE FROM road_defects WHERE cell_id = ANY(:cells)")
+# Uses the partial cell_id index of processed_agent_data, oldest first as register merges them
+SELECT_DETECTIONS_QUERY = text(
+    "SELECT road_state, latitude, longitude, timestamp FROM processed_agent_data "
+    "WHERE road_state <> 'smooth' AND cell_id = ANY(:cells) ORDER BY timestamp"
+)
+UPDATE_DEFECT_QUERY = text(
+    "UPDATE road_defects SET latitude = :latitude, longitude = :longitude, sample_count = :sample_count, "
+    "confidence = :confidence, first_seen = :first_seen, last_seen = :last_seen WHERE id = :id"
+)
+
+# (road_state, latitude, longitude, timestamp)
+DefectSample = Tuple[str, float, float, datetime]
+
+
+class DefectRegistry:
+    """
+    Incrementally clusters road defect detections into the road_defects table. A detection joins the
+    nearest defect of the same road state within merge_radius metres, moving its centroid and raising
+    its count, otherwise it starts a new defect. Defects are looked up by grid cell, and the cells a
+    batch can touch are locked for the transaction so concurrent batches do not create duplicates.
+    """
+
+    def __init__(self, merge_radius: float, confidence_prior: float):
+        self.merge_radius = merge_radius
+        self.confidence_prior = confidence_prior
+
+    def confidence(self, sample_count: int) -> float:
+        return sample_count / (sample_count + self.confidence_prior)
+
+    async def register(self, session: AsyncSession, samples: Iterable[DefectSample], merge_existing: bool = True):
+        """
+        Merge the defect samples (smooth ones are skipped) into road_defects within the session transaction,
+        or only with each other when merge_existing is False.
+        """
+        samples = sorted(
+            (sample for sample in samples
+             if sample[0] != "smooth" and sample[1] is not None and sample[2] is not None),
+            key=lambda sample: sample[3],
+        )
+        if not samples:
+            return
+        sample_cells = [grid_cells_around(latitude, longitude, self.merge_radius)
+                        for _, latitude, longitude, _ in samples]
+        cells = sorted({cell for cells in sample_cells for cell in cells})
+        await session.execute(LOCK_CELLS_QUERY, {"namespace": DEFECT_LOCK_NAMESPACE, "cells": cells})
+
+        defects_by_cell: Dict[int, List[dict]] = defaultdict(list)
+        if merge_existing:
+            for row in (await session.execute(SELECT_DEFECTS_QUERY, {"cells": cells})).mappings():
+                defect = dict(row)
+                defects_by_cell[grid_cell(defect["latitude"], defect["longitude"])].append(defect)
+
+        new_defects = []
+        changed_defects = {}
+        for (road_state, latitude, longitude, timestamp), cells in zip(samples, sample_cells):
+            nearest, nearest_distance = None, self.merge_radius
+            for cell in cells:
+                for defect in defects_by_cell.get(cell, ()):
+                    if defect["road_state"] != road_state:
+                        continue
+                    distance = haversine_distance(latitude, longitude, defect["latitude"], defect["longitude"])
+                    if distance <= nearest_distance:
+                        nearest, nearest_distance = defect, distance
+            if nearest is None:
+                defect = {"road_state": road_state, "latitude": latitude, "longitude": longitude,
+                          "sample_count": 1, "first_seen": timestamp, "last_seen": timestamp}
+                defects_by_cell[grid_cell(latitude, longitude)].append(defect)
+                new_defects.append(defect)
+                continue
+
+            # Move the centroid and keep the defect indexed by the cell it is in now
+            defects_by_cell[grid_cell(nearest["latitude"], nearest["longitude"])].remove(nearest)
+            count = nearest["sample_count"]
+            nearest["latitude"] = (nearest["latitude"] * count + latitude) / (count + 1)
+            nearest["longitude"] = (nearest["longitude"] * count + longitude) / (count + 1)
+            nearest["sample_count"] = count + 1
+            nearest["first_seen"] = min(nearest["first_seen"], timestamp)
+            nearest["last_seen"] = max(nearest["last_seen"], timestamp)
+            defects_by_cell[grid_cell(nearest["latitude"], nearest["longitude"])].append(nearest)
+            if "id" in nearest:
+                changed_defects[nearest["id"]] = nearest
+
+        for defect in new_defects + list(changed_defects.values()):
+            defect["confidence"] = self.confidence(defect["sample_count"])
+        if new_defects:
+            await session.execute(INSERT_DEFECT_QUERY, new_defects)
+        if changed_defects:
+            await session.execute(UPDATE_DEFECT_QUERY, list(changed_defects.values()))
+
+    async def rebuild(self, session: AsyncSession, cells: Iterable[int]):
+        """
+        Recompute the defects around the given grid cells from the detections stored there, within the session
+        transaction, after detections there were reclassified or deleted. A centroid can drift up to merge_radius
+        away from its detections into a neighbouring cell, so the neighbouring cells are rebuilt as well.
+        Detections already dropped by retention are no longer counted.
+        """
+        cells = sorted({near for cell in set(cells) for near in grid_cells_near(cell, self.merge_radius)})
+        if not cells:
+            return
+        # Lock every cell register may lock for these detections up front and in order, advisory locks are
+        # reentrant so register does not wait again, and two rebuilds or a rebuild and a batch cannot deadlock
+        lock_cells = sorted({near for cell in cells for near in grid_cells_near(cell, self.merge_radius)})
+        await session.execute(LOCK_CELLS_QUERY, {"namespace": DEFECT_LOCK_NAMESPACE, "cells": lock_cells})
+        await session.execute(DELETE_DEFECTS_QUERY, {"cells": cells})
+        detections = await session.execute(SELECT_DETECTIONS_QUERY, {"cells": cells})
+        # Defects outside the rebuilt cells already count the detections they merged, merging into them
+        # again would raise their counts on every rebuild
+        await self.register(session, detections.tuples().all(), merge_existing=False)
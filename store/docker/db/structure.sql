@@ -1,10 +1,104 @@
+-- Raw samples, partitioned by day on timestamp
 CREATE TABLE processed_agent_data (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     road_state VARCHAR(255) NOT NULL,
     x FLOAT,
     y FLOAT,
     z FLOAT,
     latitude FLOAT,
     longitude FLOAT,
-    timestamp TIMESTAMP
-);
\ No newline at end of file
+    timestamp TIMESTAMP NOT NULL,
+    -- Grid cell of GRID_CELL_SIZE = 0.01 degrees (see geo.py), computed on every insert and update
+    cell_id BIGINT GENERATED ALWAYS AS (
+        floor((latitude + 90) / 0.01)::BIGINT * 36000 + LEAST(floor((longitude + 180) / 0.01)::BIGINT, 35999)
+    ) STORED,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Catches rows of days without a partition, they are moved out once the partition is created
+CREATE TABLE processed_agent_data_default PARTITION OF processed_agent_data DEFAULT;
+
+-- Keyset pagination and time range filters of the list endpoint
+CREATE INDEX processed_agent_data_timestamp_id_idx ON processed_agent_data (timestamp, id);
+
+-- Bounding box and radius queries for road defects
+CREATE INDEX processed_agent_data_defects_cell_idx ON processed_agent_data (cell_id)
+    WHERE road_state <> 'smooth';
+
+-- Per cell, per day aggregates that are kept after raw partitions are dropped by the retention policy
+CREATE TABLE processed_agent_data_daily_rollup (
+    day DATE NOT NULL,
+    cell_id BIGINT NOT NULL,
+    road_state VARCHAR(255) NOT NULL,
+    sample_count BIGINT NOT NULL,
+    avg_y FLOAT,
+    min_y FLOAT,
+    max_y FLOAT,
+    avg_latitude FLOAT,
+    avg_longitude FLOAT,
+    PRIMARY KEY (day, cell_id, road_state)
+);
+
+-- Reads pg_class directly, to_regclass may not see a partition committed while waiting for a lock
+CREATE FUNCTION partition_exists(partition_name TEXT) RETURNS BOOLEAN AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM pg_class WHERE relname = partition_name AND relnamespace = current_schema()::regnamespace
+    );
+$$ LANGUAGE sql VOLATILE;
+
+-- Creates the partition of a day, moving rows of that day out of the default partition if needed
+CREATE FUNCTION ensure_processed_agent_data_partition(day DATE) RETURNS VOID AS $$
+DECLARE
+    partition_name TEXT := 'processed_agent_data_' || to_char(day, 'YYYYMMDD');
+    range_start TIMESTAMP := day;
+    range_end TIMESTAMP := day + 1;
+BEGIN
+    IF partition_exists(partition_name) THEN
+        RETURN;
+    END IF;
+    -- Partitions are created one at a time, concurrent creations deadlock on the parent and default partition
+    PERFORM pg_advisory_xact_lock(hashtext('processed_agent_data'));
+    IF partition_exists(partition_name) THEN
+        RETURN;
+    END IF;
+    IF EXISTS (
+        SELECT 1 FROM processed_agent_data_default WHERE timestamp >= range_start AND timestamp < range_end
+    ) THEN
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE processed_agent_data INCLUDING DEFAULTS INCLUDING GENERATED)', partition_name
+        );
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM processed_agent_data_default WHERE timestamp >= %L AND timestamp < %L '
+            'RETURNING id, road_state, x, y, z, latitude, longitude, timestamp) '
+            'INSERT INTO %I (id, road_state, x, y, z, latitude, longitude, timestamp) SELECT * FROM moved',
+            range_start, range_end, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE processed_agent_data ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, range_start, range_end
+        );
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF processed_agent_data FOR VALUES FROM (%L) TO (%L)',
+            partition_name, range_start, range_end
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Canonical road defects, detections of the same defect are merged by the store (see defect_registry.py)
+CREATE TABLE road_defects (
+    id SERIAL PRIMARY KEY,
+    road_state VARCHAR(255) NOT NULL,
+    latitude FLOAT NOT NULL,
+    longitude FLOAT NOT NULL,
+    cell_id BIGINT GENERATED ALWAYS AS (
+        floor((latitude + 90) / 0.01)::BIGINT * 36000 + LEAST(floor((longitude + 180) / 0.01)::BIGINT, 35999)
+    ) STORED,
+    sample_count INTEGER NOT NULL,
+    confidence FLOAT NOT NULL,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL
+);
+
+CREATE INDEX road_defects_cell_idx ON road_defects (cell_id);
@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from domain.processed_agent_data_filter import ProcessedAgentDataFilter
+
+
+# Rows selected by id, by filter or by both (rows must match both)
+class BulkSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[ProcessedAgentDataFilter] = None
+
+
+class BulkReclassify(BulkSelection):
+    road_state: str
+
+
+class RoadStateUpdate(BaseModel):
+    id: int
+    road_state: str
+
+
+class BulkRoadStateUpdate(BaseModel):
+    updates: List[RoadStateUpdate] = Field(min_length=1)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, field_validator
+
+
+class ProcessedAgentDataFilter(BaseModel):
+    # Time range, start inclusive, end exclusive
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    road_state: Optional[List[str]] = None
+    # Bounding box
+    min_latitude: Optional[float] = None
+    max_latitude: Optional[float] = None
+    min_longitude: Optional[float] = None
+    max_longitude: Optional[float] = None
+
+    @field_validator('start', 'end', mode='before')
+    def check_timestamp(cls, value):
+        if value is None or isinstance(value, datetime):
+            return value if value is None else value.replace(tzinfo=None)
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid timestamp format. Expected ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).")
@@ -0,0 +1,17 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Per cell, per day aggregate of processed agent data
+class ProcessedAgentDataRollup(BaseModel):
+    day: date
+    cell_id: int
+    road_state: str
+    sample_count: int
+    avg_y: Optional[float] = None
+    min_y: Optional[float] = None
+    max_y: Optional[float] = None
+    avg_latitude: Optional[float] = None
+    avg_longitude: Optional[float] = None
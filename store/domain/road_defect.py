@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+# Canonical road defect merged from repeated detections
+class RoadDefect(BaseModel):
+    id: int
+    road_state: str
+    latitude: float
+    longitude: float
+    sample_count: int
+    confidence: float
+    first_seen: datetime
+    last_seen: datetime
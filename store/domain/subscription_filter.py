@@ -0,0 +1,15 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+# Sent by a WebSocket client to choose which inserted rows it receives
+class SubscriptionFilter(BaseModel):
+    # Viewport, any missing side is unbounded
+    min_latitude: Optional[float] = None
+    max_latitude: Optional[float] = None
+    min_longitude: Optional[float] = None
+    max_longitude: Optional[float] = None
+    road_state: Optional[List[str]] = None
+    # Only every n-th matching smooth row is sent, defects are always sent
+    downsample: int = Field(1, ge=1)
@@ -0,0 +1,87 @@
+import math
+from typing import List, Optional, Tuple
+
+# Size of a grid cell in degrees. The cell_id column of processed_agent_data is generated by
+# Postgres with the same formula (see docker/db/structure.sql), so both must be changed together.
+GRID_CELL_SIZE = 0.01
+GRID_COLUMNS = 36000
+EARTH_RADIUS_METRES = 6371008.8
+# Expression of the generated cell_id column
+GRID_CELL_SQL = (
+    f"floor((latitude + 90) / {GRID_CELL_SIZE})::BIGINT * {GRID_COLUMNS}"
+    f" + LEAST(floor((longitude + 180) / {GRID_CELL_SIZE})::BIGINT, {GRID_COLUMNS - 1})"
+)
+
+
+def grid_row(latitude: float) -> int:
+    return math.floor((latitude + 90) / GRID_CELL_SIZE)
+
+
+def grid_column(longitude: float) -> int:
+    return min(math.floor((longitude + 180) / GRID_CELL_SIZE), GRID_COLUMNS - 1)
+
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Id of the grid cell that contains the point."""
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
+
+def grid_cell_ranges(
+    min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float, max_rows: int
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Cells covering a bounding box as one inclusive (first, last) cell id range per grid row.
+    Returns None when the box spans more than max_rows grid rows, where a cell filter stops paying off.
+    """
+    first_row, last_row = grid_row(min_latitude), grid_row(max_latitude)
+    if last_row - first_row + 1 > max_rows:
+        return None
+    first_column, last_column = grid_column(min_longitude), grid_column(max_longitude)
+    return [
+        (row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column)
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def grid_cells_around(latitude: float, longitude: float, radius: float) -> List[int]:
+    """Ids of the grid cells that intersect the box around the circle of radius metres."""
+    cells = []
+    for first, last in grid_cell_ranges(*bbox_around(latitude, longitude, radius), max_rows=GRID_COLUMNS):
+        cells.extend(range(first, last + 1))
+    return cells
+
+
+def grid_cells_near(cell: int, radius: float) -> List[int]:
+    """Ids of the grid cells that intersect the box around a cell grown by radius metres, the cell included."""
+    row, column = divmod(cell, GRID_COLUMNS)
+    corners = [bbox_around(latitude, longitude, radius)
+               for latitude in (row * GRID_CELL_SIZE - 90, (row + 1) * GRID_CELL_SIZE - 90)
+               for longitude in (column * GRID_CELL_SIZE - 180, (column + 1) * GRID_CELL_SIZE - 180)]
+    box = (min(corner[0] for corner in corners), min(corner[1] for corner in corners),
+           max(corner[2] for corner in corners), max(corner[3] for corner in corners))
+    cells = []
+    for first, last in grid_cell_ranges(*box, max_rows=GRID_COLUMNS):
+        cells.extend(range(first, last + 1))
+    return cells
+
+
+def haversine_distance(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great circle distance between two points in metres."""
+    delta_latitude = math.radians(latitude2 - latitude1)
+    delta_longitude = math.radians(longitude2 - longitude1)
+    a = (math.sin(delta_latitude / 2) ** 2
+         + math.cos(math.radians(latitude1)) * math.cos(math.radians(latitude2)) * math.sin(delta_longitude / 2) ** 2)
+    return 2 * EARTH_RADIUS_METRES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bbox_around(latitude: float, longitude: float, radius: float) -> Tuple[float, float, float, float]:
+    """(min_latitude, min_longitude, max_latitude, max_longitude) of a box containing the circle of radius metres."""
+    delta_latitude = math.degrees(radius / EARTH_RADIUS_METRES)
+    cos_latitude = max(math.cos(math.radians(latitude)), 1e-6)
+    delta_longitude = min(math.degrees(radius / (EARTH_RADIUS_METRES * cos_latitude)), 180.0)
+    return (
+        max(latitude - delta_latitude, -90.0),
+        max(longitude - delta_longitude, -180.0),
+        min(latitude + delta_latitude, 90.0),
+        min(longitude + delta_longitude, 180.0),
+    )
@@ -0,0 +1,57 @@
+import zlib
+
+from starlette.exceptions import HTTPException
+
+# Every service is built from its own directory, so the store and the hub keep identical copies of this
+# module (store/gzip_request_middleware.py, hub/app/gzip_request_middleware.py), change both together.
+
+
+class GzipRequestMiddleware:
+    """
+    ASGI middleware that decompresses request bodies sent with "Content-Encoding: gzip".
+    Bodies that grow beyond max_size bytes are rejected with 413 as soon as the limit is passed, without
+    decompressing the rest, and broken or truncated gzip data with 400.
+    """
+
+    def __init__(self, app, max_size: int = 64 * 1024 * 1024):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if headers.get(b"content-encoding", b"").lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        size = 0
+
+        async def receive_decompressed():
+            nonlocal size
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            more_body = message.get("more_body", False)
+            try:
+                # At most one byte more than the limit allows, so a gzip bomb is never inflated in memory
+                body = decompressor.decompress(message.get("body", b""), self.max_size - size + 1)
+                if len(body) <= self.max_size - size and not more_body:
+                    body += decompressor.flush()
+            except zlib.error as e:
+                raise HTTPException(status_code=400, detail=f"Invalid gzip request body: {e}")
+            size += len(body)
+            if size > self.max_size:
+                raise HTTPException(status_code=413, detail="Request body is too large")
+            if not more_body and not decompressor.eof:
+                raise HTTPException(status_code=400, detail="Invalid gzip request body: truncated data")
+            return {**message, "body": body}
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        await self.app(scope, receive_decompressed, send)
@@ -1,18 +1,60 @@
+import asyncio
+import base64
 import json
-from typing import List, Set
-from fastapi import FastAPI, HTTPException
-from sqlalchemy import MetaData, Table, Column, Float, String, Integer, DateTime
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+from datetime import date, datetime
+from typing import List, Literal, Optional, Set
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import (MetaData, Table, Column, Float, String, Integer, BigInteger, Date, DateTime, Computed, func,
+                        or_, tuple_, any_, bindparam, column, select, values)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from starlette.websockets import WebSocket, WebSocketDisconnect
-from config import POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB
+from bulk_import import COPY_COLUMNS, BulkImportError, iter_records
+from config import (POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB, DB_POOL_SIZE,
+                    DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE,
+                    IMPORT_CHUNK_SIZE,
+                    LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT, GRID_MAX_QUERY_ROWS, PARTITION_RETENTION_DAYS,
+                    PARTITION_PRECREATE_DAYS, PARTITION_MAINTENANCE_INTERVAL, DEFECT_MERGE_RADIUS,
+                    DEFECT_CONFIDENCE_PRIOR, WS_QUEUE_SIZE, WS_OVERFLOW_POLICY, BROADCAST_BACKEND,
+                    BROADCAST_CHANNEL, REDIS_HOST, REDIS_PORT, CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL,
+                    CACHE_LIST_TTL, BULK_UPDATE_CHUNK_SIZE)
+from broadcast_backend import BroadcastBackend, InMemoryBroadcastBackend, RedisBroadcastBackend
+from broadcaster import Broadcaster, processed_agent_data_in_db_list_adapter
+from cache import CacheBackend, InMemoryCache, ReadThroughCache, RedisCache
+from db_pool import InstrumentedAsyncQueuePool
+from defect_registry import DefectRegistry
+from domain.bulk_operations import BulkReclassify, BulkRoadStateUpdate, BulkSelection
 from domain.processed_agent_data import ProcessedAgentData
+from domain.processed_agent_data_filter import ProcessedAgentDataFilter
+from domain.processed_agent_data_rollup import ProcessedAgentDataRollup
+from domain.road_defect import RoadDefect
+from domain.subscription_filter import SubscriptionFilter
+from geo import EARTH_RADIUS_METRES, GRID_CELL_SQL, bbox_around, grid_cell, grid_cell_ranges
+from gzip_request_middleware import GzipRequestMiddleware
+from partitions import ENSURE_PARTITION_QUERY, PartitionManager
 from domain.processed_agent_data_in_db import ProcessedAgentDataInDB
 
 
 # SQLAlchemy setup
 DATABASE_URL = (f"postgresql+asyncpg://"
-                f"{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
-async_engine = create_async_engine(DATABASE_URL)
+                f"{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+                f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}")
+async_engine = create_async_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+# Shares the pool, used by read-only endpoints to run single selects without BEGIN/COMMIT round trips
+read_engine = async_engine.execution_options(isolation_level="AUTOCOMMIT")
 async_db_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 metadata = MetaData()
 
@@ -20,40 +62,150 @@ metadata = MetaData()
 processed_agent_data_table = Table(
     "processed_agent_data",
     metadata,
-    Column("id", Integer, primary_key=True, index=True),
+    Column("id", Integer, primary_key=True, autoincrement=True, index=True),
     Column("road_state", String),
     Column("x", Float),
     Column("y", Float),
     Column("z", Float),
     Column("latitude", Float),
     Column("longitude", Float),
-    Column("timestamp", DateTime),
+    # Partition key, daily partitions are managed by PartitionManager
+    Column("timestamp", DateTime, primary_key=True),
+    # Generated by Postgres from latitude and longitude, see geo.grid_cell
+    Column("cell_id", BigInteger, Computed(GRID_CELL_SQL, persisted=True)),
 )
 
+# Per cell, per day aggregates kept after raw partitions expire
+processed_agent_data_rollup_table = Table(
+    "processed_agent_data_daily_rollup",
+    metadata,
+    Column("day", Date, primary_key=True),
+    Column("cell_id", BigInteger, primary_key=True),
+    Column("road_state", String, primary_key=True),
+    Column("sample_count", BigInteger),
+    Column("avg_y", Float),
+    Column("min_y", Float),
+    Column("max_y", Float),
+    Column("avg_latitude", Float),
+    Column("avg_longitude", Float),
+)
 
-# FastAPI app setup
-app = FastAPI()
+# Canonical road defects merged from detections by DefectRegistry
+road_defects_table = Table(
+    "road_defects",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("road_state", String),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("cell_id", BigInteger, Computed(GRID_CELL_SQL, persisted=True)),
+    Column("sample_count", Integer),
+    Column("confidence", Float),
+    Column("first_seen", DateTime),
+    Column("last_seen", DateTime),
+)
+
+partition_manager = PartitionManager(
+    async_engine,
+    retention_days=PARTITION_RETENTION_DAYS,
+    precreate_days=PARTITION_PRECREATE_DAYS,
+    maintenance_interval=PARTITION_MAINTENANCE_INTERVAL,
+)
+defect_registry = DefectRegistry(merge_radius=DEFECT_MERGE_RADIUS, confidence_prior=DEFECT_CONFIDENCE_PRIOR)
 # WebSocket subscriptions
-subscriptions: Set[WebSocket] = set()
+broadcaster = Broadcaster(queue_size=WS_QUEUE_SIZE, overflow_policy=WS_OVERFLOW_POLICY)
+road_defect_list_adapter = TypeAdapter(List[RoadDefect])
+
+
+def create_broadcast_backend() -> BroadcastBackend:
+    if BROADCAST_BACKEND == "redis":
+        return RedisBroadcastBackend(host=REDIS_HOST, port=REDIS_PORT, channel=BROADCAST_CHANNEL)
+    return InMemoryBroadcastBackend()
+
+
+broadcast_backend = create_broadcast_backend()
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    if CACHE_BACKEND == "redis":
+        return RedisCache(host=REDIS_HOST, port=REDIS_PORT)
+    if CACHE_BACKEND == "none":
+        return None
+    return InMemoryCache(max_entries=CACHE_MAX_ENTRIES)
+
+
+cache = ReadThroughCache(create_cache_backend())
+
+
+# Namespace of cached rows by id, cleared as a whole after bulk changes selected by a filter
+ROW_CACHE_PREFIX = "processed_agent_data:row:"
+
+
+def row_cache_key(processed_agent_data_id: int) -> str:
+    return f"{ROW_CACHE_PREFIX}{processed_agent_data_id}"
+
+
+def query_cache_key(prefix: str, request: Request) -> str:
+    return f"{prefix}:{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def on_broadcast_message(message: bytes):
+    """Rows inserted by any worker, sent to the WebSocket subscribers of this one."""
+    broadcaster.publish(message)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    maintenance_task = asyncio.create_task(partition_manager.run_maintenance())
+    await broadcast_backend.start(on_broadcast_message)
+    yield
+    maintenance_task.cancel()
+    await broadcast_backend.stop()
+    broadcaster.close()
+    await cache.close()
+    await async_engine.dispose()
+
+
+# FastAPI app setup
+app = FastAPI(lifespan=lifespan)
+# Hub may send gzip compressed request bodies
+app.add_middleware(GzipRequestMiddleware)
 
 
 # FastAPI WebSocket endpoint
 @app.websocket("/ws/")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Sends inserted rows as JSON arrays. A client may send a SubscriptionFilter JSON object at any time
+    to receive only matching rows, and null to receive every row again.
+    """
     await websocket.accept()
-    subscriptions.add(websocket)
+    subscriber = broadcaster.subscribe(websocket)
     try:
         while True:
-            await websocket.receive_text()
+            message = await websocket.receive_text()
+            try:
+                subscriber.set_filter(
+                    None if message.strip() == "null" else SubscriptionFilter.model_validate_json(message)
+                )
+            except ValidationError as e:
+                broadcaster.send(subscriber, json.dumps({"error": str(e)}))
     except WebSocketDisconnect:
-        subscriptions.remove(websocket)
+        pass
+    finally:
+        broadcaster.unsubscribe(subscriber)
 
 
 # Function to send data to subscribed users
-async def send_data_to_subscribers(data):
-    for websocket in subscriptions:
-        data = [json.loads(item.json()) for item in data]
-        await websocket.send_json(json.dumps(data))
+async def send_data_to_subscribers(data: List[ProcessedAgentDataInDB]):
+    """
+    Publish the rows to the subscribers of every worker without waiting on any WebSocket client.
+    The rows are already committed, so a failing broadcast backend is only logged.
+    """
+    try:
+        await broadcast_backend.publish(processed_agent_data_in_db_list_adapter.dump_json(data))
+    except Exception as e:
+        logging.error(f"Failed to broadcast {len(data)} inserted rows: {e}")
 
 
 # FastAPI CRUD endpoints
@@ -74,6 +226,7 @@ async def create_processed_agent_data(data: List[ProcessedAgentData], response_m
             }
         )
 
+    await partition_manager.ensure_partitions(item["timestamp"] for item in data_to_insert)
     async with async_db_session.begin() as session:
         query = processed_agent_data_table.insert().returning(processed_agent_data_table)
 
@@ -81,6 +234,10 @@ async def create_processed_agent_data(data: List[ProcessedAgentData], response_m
         result_data = results.mappings().all()
         if len(result_data) != len(data_to_insert):
             raise Exception("Error inserting data")
+        await defect_registry.register(
+            session,
+            [(item["road_state"], item["latitude"], item["longitude"], item["timestamp"]) for item in data_to_insert],
+        )
 
     result_models = [ProcessedAgentDataInDB(**result) for result in result_data]
 
@@ -90,29 +247,453 @@ async def create_processed_agent_data(data: List[ProcessedAgentData], response_m
     return result_models
 
 
+@app.post("/processed_agent_data/import/")
+async def import_processed_agent_data(request: Request):
+    """
+    Bulk load a streamed NDJSON (one ProcessedAgentData per line) or CSV (text/csv, with a header line)
+    body with COPY in a single transaction. Only the number of inserted rows is returned and imported
+    rows are not sent to WebSocket subscribers. Detected defects are merged into road_defects after
+    the import has committed.
+    """
+    content_type = request.headers.get("content-type", "application/x-ndjson")
+    inserted = 0
+    created_days: Set[date] = set()
+    defect_samples = []
+    async with async_engine.connect() as connection:
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        async def copy_chunk(records):
+            # Missing partitions are created in the import transaction, which already holds a lock on the table
+            for day in sorted(partition_manager.missing_days(record[-1] for record in records) - created_days):
+                await driver_connection.execute(ENSURE_PARTITION_QUERY, day)
+                created_days.add(day)
+            await driver_connection.copy_records_to_table(
+                processed_agent_data_table.name, records=records, columns=COPY_COLUMNS
+            )
+            defect_samples.extend(
+                (road_state, latitude, longitude, timestamp)
+                for road_state, _, _, _, latitude, longitude, timestamp in records if road_state != "smooth"
+            )
+
+        try:
+            async with driver_connection.transaction():
+                records = []
+                async for record in iter_records(request.stream(), content_type):
+                    records.append(record)
+                    if len(records) >= IMPORT_CHUNK_SIZE:
+                        await copy_chunk(records)
+                        inserted += len(records)
+                        records = []
+                if records:
+                    await copy_chunk(records)
+                    inserted += len(records)
+        except BulkImportError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    partition_manager.mark_created(created_days)
+    async with async_db_session.begin() as session:
+        await defect_registry.register(session, defect_samples)
+
+    return {"inserted": inserted}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "db_pool": async_engine.pool.snapshot(),
+        "websocket": {
+            "subscribers": len(broadcaster.subscribers),
+            "dropped_messages": broadcaster.dropped_messages,
+            "disconnected_subscribers": broadcaster.disconnected_subscribers,
+        },
+        "cache": cache.snapshot(),
+    }
+
+
 @app.get("/processed_agent_data/{processed_agent_data_id}", response_model=ProcessedAgentDataInDB)
 async def read_processed_agent_data(processed_agent_data_id: int):
-    async with async_db_session.begin() as session:
-        query = processed_agent_data_table.select().where(processed_agent_data_table.c.id == processed_agent_data_id)
-        result = await session.execute(query)
-        data = result.mappings().first()
+    async def load():
+        async with read_engine.connect() as connection:
+            query = processed_agent_data_table.select().where(
+                processed_agent_data_table.c.id == processed_agent_data_id
+            )
+            result = await connection.execute(query)
+            data = result.mappings().first()
+        return None if data is None else ProcessedAgentDataInDB(**data).model_dump_json().encode()
 
-    if data is None:
+    body = await cache.get_or_load(row_cache_key(processed_agent_data_id), CACHE_TTL, load)
+    if body is None:
         raise HTTPException(status_code=404, detail="Data not found")
 
-    return ProcessedAgentDataInDB(**data)
+    return Response(content=body, media_type="application/json")
+
+
+def processed_agent_data_filter(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    road_state: Optional[List[str]] = Query(None),
+    min_latitude: Optional[float] = None,
+    max_latitude: Optional[float] = None,
+    min_longitude: Optional[float] = None,
+    max_longitude: Optional[float] = None,
+) -> ProcessedAgentDataFilter:
+    return ProcessedAgentDataFilter(
+        start=start, end=end, road_state=road_state,
+        min_latitude=min_latitude, max_latitude=max_latitude,
+        min_longitude=min_longitude, max_longitude=max_longitude,
+    )
+
+
+def filter_conditions(data_filter: ProcessedAgentDataFilter) -> list:
+    """Translate a filter into SQLAlchemy WHERE conditions on processed_agent_data."""
+    c = processed_agent_data_table.c
+    conditions = []
+    if data_filter.start is not None:
+        conditions.append(c.timestamp >= data_filter.start)
+    if data_filter.end is not None:
+        conditions.append(c.timestamp < data_filter.end)
+    if data_filter.road_state:
+        conditions.append(c.road_state.in_(data_filter.road_state))
+    if data_filter.min_latitude is not None:
+        conditions.append(c.latitude >= data_filter.min_latitude)
+    if data_filter.max_latitude is not None:
+        conditions.append(c.latitude <= data_filter.max_latitude)
+    if data_filter.min_longitude is not None:
+        conditions.append(c.longitude >= data_filter.min_longitude)
+    if data_filter.max_longitude is not None:
+        conditions.append(c.longitude <= data_filter.max_longitude)
+    return conditions
+
+
+def encode_cursor(row, order_by: str) -> str:
+    key = [row["id"]] if order_by == "id" else [row["timestamp"].isoformat(), row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def is_row_id(value) -> bool:
+    """Whether a decoded JSON value fits the SERIAL id column."""
+    return type(value) is int and -2 ** 31 <= value < 2 ** 31
+
+
+def cursor_condition(cursor: str, order_by: str):
+    """
+    Keyset condition that selects rows after the cursor in the given order. Cursors come from clients,
+    so anything but the [id] or [timestamp, id] list encode_cursor produces is a 400.
+    """
+    c = processed_agent_data_table.c
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if order_by == "id":
+            if isinstance(key, list) and len(key) == 1 and is_row_id(key[0]):
+                return c.id > key[0]
+        elif isinstance(key, list) and len(key) == 2 and isinstance(key[0], str) and is_row_id(key[1]):
+            return tuple_(c.timestamp, c.id) > tuple_(datetime.fromisoformat(key[0]), key[1])
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @app.get("/processed_agent_data/", response_model=list[ProcessedAgentDataInDB])
-async def list_processed_agent_data():
-    async with async_db_session.begin() as session:
-        query = processed_agent_data_table.select()
-        results = await session.execute(query)
+async def list_processed_agent_data(
+    request: Request,
+    data_filter: ProcessedAgentDataFilter = Depends(processed_agent_data_filter),
+    order_by: Literal["id", "timestamp"] = "id",
+    cursor: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    format: Literal["json", "ndjson"] = "json",
+):
+    """
+    List rows page by page with keyset pagination. The cursor of the next page is returned in the
+    X-Next-Cursor header while there may be more rows. With format=ndjson all matching rows after the
+    cursor are streamed one JSON object per line straight from a database cursor, without a limit.
+    """
+    c = processed_agent_data_table.c
+    conditions = filter_conditions(data_filter)
+    if cursor is not None:
+        conditions.append(cursor_condition(cursor, order_by))
+    order = [c.id] if order_by == "id" else [c.timestamp, c.id]
+    query = processed_agent_data_table.select().where(*conditions).order_by(*order)
+
+    if format == "ndjson":
+        async def stream_rows():
+            async with async_engine.connect() as connection:
+                result = await connection.stream(query)
+                async for row in result.mappings():
+                    yield ProcessedAgentDataInDB(**row).model_dump_json() + "\n"
+
+        return StreamingResponse(stream_rows(), media_type="application/x-ndjson")
+
+    async def load():
+        async with read_engine.connect() as connection:
+            results = await connection.execute(query.limit(limit))
+            data = results.mappings().all()
+        next_cursor = encode_cursor(data[-1], order_by) if len(data) == limit else ""
+        body = processed_agent_data_in_db_list_adapter.dump_json([ProcessedAgentDataInDB(**row) for row in data])
+        # Cached together with the page, a cursor never contains a newline
+        return next_cursor.encode() + b"\n" + body
+
+    # Dashboards poll the same pages, they are cached for a short time and not invalidated on writes
+    cached = await cache.get_or_load(query_cache_key("processed_agent_data", request), CACHE_LIST_TTL, load)
+    next_cursor, body = cached.split(b"\n", 1)
+    headers = {"X-Next-Cursor": next_cursor.decode()} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def defect_conditions(
+    min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float,
+    road_state: Optional[List[str]],
+) -> list:
+    """Conditions for road defects inside a bounding box that can use the partial cell_id index."""
+    c = processed_agent_data_table.c
+    conditions = [
+        c.road_state != "smooth",
+        c.latitude.between(min_latitude, max_latitude),
+        c.longitude.between(min_longitude, max_longitude),
+    ]
+    if road_state:
+        conditions.append(c.road_state.in_(road_state))
+    cell_ranges = grid_cell_ranges(min_latitude, min_longitude, max_latitude, max_longitude, GRID_MAX_QUERY_ROWS)
+    if cell_ranges is not None:
+        conditions.append(or_(*[c.cell_id.between(first, last) for first, last in cell_ranges]))
+    return conditions
+
+
+@app.get("/processed_agent_data/defects/bbox", response_model=list[ProcessedAgentDataInDB])
+async def list_defects_in_bbox(
+    min_latitude: float = Query(ge=-90, le=90),
+    min_longitude: float = Query(ge=-180, le=180),
+    max_latitude: float = Query(ge=-90, le=90),
+    max_longitude: float = Query(ge=-180, le=180),
+    road_state: Optional[List[str]] = Query(None),
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+):
+    """Road defects (every road state except smooth) inside a bounding box, newest first."""
+    c = processed_agent_data_table.c
+    query = (
+        processed_agent_data_table.select()
+        .where(*defect_conditions(min_latitude, min_longitude, max_latitude, max_longitude, road_state))
+        .order_by(c.timestamp.desc())
+        .limit(limit)
+    )
+    async with read_engine.connect() as connection:
+        results = await connection.execute(query)
+        data = results.mappings().all()
+
+    return [ProcessedAgentDataInDB(**result) for result in data]
+
+
+@app.get("/processed_agent_data/defects/radius", response_model=list[ProcessedAgentDataInDB])
+async def list_defects_in_radius(
+    latitude: float = Query(ge=-90, le=90),
+    longitude: float = Query(ge=-180, le=180),
+    radius: float = Query(gt=0, description="Radius in metres"),
+    road_state: Optional[List[str]] = Query(None),
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+):
+    """Road defects within radius metres of a point, nearest first."""
+    c = processed_agent_data_table.c
+    # Haversine distance in metres
+    distance = 2 * EARTH_RADIUS_METRES * func.asin(func.sqrt(
+        func.power(func.sin(func.radians(c.latitude - latitude) / 2), 2)
+        + func.cos(func.radians(latitude)) * func.cos(func.radians(c.latitude))
+        * func.power(func.sin(func.radians(c.longitude - longitude) / 2), 2)
+    ))
+    query = (
+        processed_agent_data_table.select()
+        .where(*defect_conditions(*bbox_around(latitude, longitude, radius), road_state), distance <= radius)
+        .order_by(distance)
+        .limit(limit)
+    )
+    async with read_engine.connect() as connection:
+        results = await connection.execute(query)
         data = results.mappings().all()
 
     return [ProcessedAgentDataInDB(**result) for result in data]
 
 
+@app.get("/processed_agent_data/rollups/", response_model=list[ProcessedAgentDataRollup])
+async def list_processed_agent_data_rollups(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    road_state: Optional[List[str]] = Query(None),
+    min_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    min_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    max_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+):
+    """Daily per cell aggregates of samples whose raw rows were dropped by the retention policy."""
+    c = processed_agent_data_rollup_table.c
+    conditions = []
+    if start is not None:
+        conditions.append(c.day >= start)
+    if end is not None:
+        conditions.append(c.day < end)
+    if road_state:
+        conditions.append(c.road_state.in_(road_state))
+    bbox = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if all(value is not None for value in bbox):
+        conditions.append(c.avg_latitude.between(min_latitude, max_latitude))
+        conditions.append(c.avg_longitude.between(min_longitude, max_longitude))
+        cell_ranges = grid_cell_ranges(*bbox, GRID_MAX_QUERY_ROWS)
+        if cell_ranges is not None:
+            conditions.append(or_(*[c.cell_id.between(first, last) for first, last in cell_ranges]))
+    elif any(value is not None for value in bbox):
+        raise HTTPException(status_code=400, detail="Bounding box needs all four coordinates")
+    query = (
+        processed_agent_data_rollup_table.select()
+        .where(*conditions)
+        .order_by(c.day, c.cell_id, c.road_state)
+        .limit(limit)
+    )
+    async with read_engine.connect() as connection:
+        results = await connection.execute(query)
+        data = results.mappings().all()
+
+    return [ProcessedAgentDataRollup(**result) for result in data]
+
+
+@app.get("/road_defects/", response_model=list[RoadDefect])
+async def list_road_defects(
+    request: Request,
+    min_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    min_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    max_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    road_state: Optional[List[str]] = Query(None),
+    min_confidence: float = Query(0.0, ge=0, le=1),
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+):
+    """Canonical road defects, optionally inside a bounding box, most recently seen first."""
+    c = road_defects_table.c
+    conditions = [c.confidence >= min_confidence]
+    if road_state:
+        conditions.append(c.road_state.in_(road_state))
+    bbox = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if all(value is not None for value in bbox):
+        conditions.append(c.latitude.between(min_latitude, max_latitude))
+        conditions.append(c.longitude.between(min_longitude, max_longitude))
+        cell_ranges = grid_cell_ranges(*bbox, GRID_MAX_QUERY_ROWS)
+        if cell_ranges is not None:
+            conditions.append(or_(*[c.cell_id.between(first, last) for first, last in cell_ranges]))
+    elif any(value is not None for value in bbox):
+        raise HTTPException(status_code=400, detail="Bounding box needs all four coordinates")
+    query = road_defects_table.select().where(*conditions).order_by(c.last_seen.desc()).limit(limit)
+
+    async def load():
+        async with read_engine.connect() as connection:
+            results = await connection.execute(query)
+            data = results.mappings().all()
+        return road_defect_list_adapter.dump_json([RoadDefect(**row) for row in data])
+
+    body = await cache.get_or_load(query_cache_key("road_defects", request), CACHE_LIST_TTL, load)
+    return Response(content=body, media_type="application/json")
+
+
+def bulk_selection_conditions(selection: BulkSelection) -> list:
+    """WHERE conditions of a bulk selection, refusing selections that would match the whole table."""
+    conditions = []
+    if selection.ids is not None:
+        # One array parameter whatever the number of ids
+        conditions.append(
+            processed_agent_data_table.c.id == any_(bindparam("ids", selection.ids, type_=ARRAY(Integer)))
+        )
+    if selection.filter is not None:
+        conditions.extend(filter_conditions(selection.filter))
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Select rows by ids or by a non-empty filter")
+    return conditions
+
+
+async def invalidate_bulk_selection(selection: BulkSelection):
+    """
+    Drop cached rows a bulk change may have touched: the listed ids, or the whole row namespace
+    when rows are only selected by a filter, which may match any number of them.
+    """
+    if selection.ids is not None:
+        await cache.invalidate([row_cache_key(selected_id) for selected_id in selection.ids])
+    else:
+        await cache.invalidate_prefix(ROW_CACHE_PREFIX)
+
+
+async def touched_defect_cells(session: AsyncSession, query) -> List[int]:
+    """Distinct cell ids a query selects, read before rows there change road state or are deleted."""
+    return list((await session.execute(query)).scalars())
+
+
+@app.post("/processed_agent_data/bulk/reclassify/")
+async def reclassify_processed_agent_data(data: BulkReclassify):
+    """
+    Set the road state of every selected row with a single UPDATE, and rebuild the road defects of
+    the grid cells where rows changed road state in the same transaction.
+    """
+    c = processed_agent_data_table.c
+    conditions = bulk_selection_conditions(data)
+    query = processed_agent_data_table.update().where(*conditions).values(road_state=data.road_state)
+    async with async_db_session.begin() as session:
+        cells = await touched_defect_cells(
+            session, select(c.cell_id).distinct().where(*conditions, c.road_state != data.road_state)
+        )
+        updated = (await session.execute(query)).rowcount
+        await defect_registry.rebuild(session, cells)
+
+    await invalidate_bulk_selection(data)
+    return {"updated": updated}
+
+
+@app.post("/processed_agent_data/bulk/delete/")
+async def bulk_delete_processed_agent_data(data: BulkSelection):
+    """
+    Delete every selected row with a single DELETE, and rebuild the road defects of the grid cells
+    where defect detections were deleted in the same transaction.
+    """
+    c = processed_agent_data_table.c
+    conditions = bulk_selection_conditions(data)
+    query = processed_agent_data_table.delete().where(*conditions)
+    async with async_db_session.begin() as session:
+        cells = await touched_defect_cells(
+            session, select(c.cell_id).distinct().where(*conditions, c.road_state != "smooth")
+        )
+        deleted = (await session.execute(query)).rowcount
+        await defect_registry.rebuild(session, cells)
+
+    await invalidate_bulk_selection(data)
+    return {"deleted": deleted}
+
+
+@app.post("/processed_agent_data/bulk/road_state/")
+async def bulk_update_road_state(data: BulkRoadStateUpdate):
+    """
+    Apply (id, road_state) pairs, e.g. the output of a classifier re-run over history, with
+    UPDATE ... FROM (VALUES ...) statements of up to BULK_UPDATE_CHUNK_SIZE pairs in one transaction,
+    which also rebuilds the road defects of the grid cells where rows changed road state.
+    """
+    c = processed_agent_data_table.c
+    updated = 0
+    cells = set()
+    async with async_db_session.begin() as session:
+        for start in range(0, len(data.updates), BULK_UPDATE_CHUNK_SIZE):
+            chunk = data.updates[start:start + BULK_UPDATE_CHUNK_SIZE]
+            new_road_states = values(column("id", Integer), column("road_state", String), name="new_road_states").data(
+                [(update.id, update.road_state) for update in chunk]
+            )
+            cells.update(await touched_defect_cells(
+                session,
+                select(c.cell_id).distinct()
+                .where(c.id == new_road_states.c.id, c.road_state != new_road_states.c.road_state),
+            ))
+            query = (
+                processed_agent_data_table.update()
+                .where(c.id == new_road_states.c.id)
+                .values(road_state=new_road_states.c.road_state)
+            )
+            updated += (await session.execute(query)).rowcount
+        await defect_registry.rebuild(session, cells)
+
+    await cache.invalidate([row_cache_key(update.id) for update in data.updates])
+    return {"updated": updated}
+
+
 @app.put("/processed_agent_data/{processed_agent_data_id}", response_model=ProcessedAgentDataInDB)
 async def update_processed_agent_data(processed_agent_data_id: int, data: ProcessedAgentData):
     agent_data = data.agent_data
@@ -128,7 +709,13 @@ async def update_processed_agent_data(processed_agent_data_id: int, data: Proces
         timestamp=agent_data.timestamp
     )
 
+    # A new timestamp may move the row to another partition
+    await partition_manager.ensure_partitions([processed_agent_data_db.timestamp])
+    c = processed_agent_data_table.c
     async with async_db_session.begin() as session:
+        old_row = (await session.execute(
+            select(c.cell_id, c.road_state).where(c.id == processed_agent_data_id)
+        )).first()
         # Update data in the database
         query = (
             processed_agent_data_table.update()
@@ -148,6 +735,14 @@ async def update_processed_agent_data(processed_agent_data_id: int, data: Proces
         result = await session.execute(query)
         if result.fetchone() is None:
             raise HTTPException(402, "Error updating data")
+        # Rebuild the defects where the row was a detection before and where it is one now
+        cells = []
+        if old_row.road_state != "smooth":
+            cells.append(old_row.cell_id)
+        if processed_agent_data_db.road_state != "smooth":
+            cells.append(grid_cell(processed_agent_data_db.latitude, processed_agent_data_db.longitude))
+        await defect_registry.rebuild(session, cells)
+    await cache.invalidate([row_cache_key(processed_agent_data_id)])
 
     # Return updated data
     return processed_agent_data_db
@@ -159,12 +754,16 @@ async def delete_processed_agent_data(processed_agent_data_id: int):
         # Delete by id
         query = processed_agent_data_table.delete().where(
             processed_agent_data_table.c.id == processed_agent_data_id
-        ).returning(processed_agent_data_table.c.id)
+        ).returning(processed_agent_data_table.c.cell_id, processed_agent_data_table.c.road_state)
 
         result = await session.execute(query)
+        deleted_row = result.fetchone()
 
-        if result.fetchone() is None:
+        if deleted_row is None:
             raise HTTPException(status_code=404, detail="Data not found")
+        if deleted_row.road_state != "smooth":
+            await defect_registry.rebuild(session, [deleted_row.cell_id])
+    await cache.invalidate([row_cache_key(processed_agent_data_id)])
 
 
 if __name__ == "__main__":
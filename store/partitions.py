@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+PARTITION_PREFIX = "processed_agent_data_"
+ENSURE_PARTITION_QUERY = "SELECT ensure_processed_agent_data_partition($1)"
+DEFAULT_PARTITION = "processed_agent_data_default"
+
+ROLLUP_QUERY = """
+INSERT INTO processed_agent_data_daily_rollup
+    (day, cell_id, road_state, sample_count, avg_y, min_y, max_y, avg_latitude, avg_longitude)
+SELECT timestamp::date, cell_id, road_state, count(*), avg(y), min(y), max(y), avg(latitude), avg(longitude)
+FROM {table}
+WHERE timestamp < :cutoff
+GROUP BY timestamp::date, cell_id, road_state
+ON CONFLICT (day, cell_id, road_state) DO UPDATE SET
+    avg_y = (processed_agent_data_daily_rollup.avg_y * processed_agent_data_daily_rollup.sample_count
+             + EXCLUDED.avg_y * EXCLUDED.sample_count)
+            / (processed_agent_data_daily_rollup.sample_count + EXCLUDED.sample_count),
+    avg_latitude = (processed_agent_data_daily_rollup.avg_latitude * processed_agent_data_daily_rollup.sample_count
+                    + EXCLUDED.avg_latitude * EXCLUDED.sample_count)
+                   / (processed_agent_data_daily_rollup.sample_count + EXCLUDED.sample_count),
+    avg_longitude = (processed_agent_data_daily_rollup.avg_longitude * processed_agent_data_daily_rollup.sample_count
+                     + EXCLUDED.avg_longitude * EXCLUDED.sample_count)
+                    / (processed_agent_data_daily_rollup.sample_count + EXCLUDED.sample_count),
+    min_y = LEAST(processed_agent_data_daily_rollup.min_y, EXCLUDED.min_y),
+    max_y = GREATEST(processed_agent_data_daily_rollup.max_y, EXCLUDED.max_y),
+    sample_count = processed_agent_data_daily_rollup.sample_count + EXCLUDED.sample_count
+"""
+
+LIST_PARTITIONS_QUERY = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'processed_agent_data'::regclass
+"""
+
+
+def partition_day(partition_name: str):
+    """Day of a daily partition from its name, None for the default partition."""
+    try:
+        return datetime.strptime(partition_name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def utc_today() -> date:
+    """Current day in UTC, the time zone of the stored (naive) timestamps."""
+    return datetime.now(timezone.utc).date()
+
+
+class PartitionManager:
+    """
+    Keeps daily partitions of processed_agent_data: creates them ahead of time and on demand before
+    inserts, and drops raw partitions older than retention_days after rolling them up per cell and day.
+    """
+
+    def __init__(self, engine: AsyncEngine, retention_days: int, precreate_days: int, maintenance_interval: float):
+        self.engine = engine
+        self.retention_days = retention_days
+        self.precreate_days = precreate_days
+        self.maintenance_interval = maintenance_interval
+        self._known_days: Set[date] = set()
+
+    def missing_days(self, timestamps: Iterable[datetime]) -> Set[date]:
+        """Days of the given timestamps whose partitions have not been created by this process yet."""
+        return {timestamp.date() for timestamp in timestamps} - self._known_days
+
+    def mark_created(self, days: Iterable[date]):
+        """Remember partitions created in a transaction that has committed."""
+        self._known_days.update(days)
+
+    async def ensure_partitions(self, timestamps: Iterable[datetime]):
+        """
+        Create the partitions for the days of the given timestamps if they do not exist yet. Runs in its
+        own transaction, so it must not be called while a transaction that wrote to the table is open.
+        """
+        missing_days = self.missing_days(timestamps)
+        if not missing_days:
+            return
+        async with self.engine.begin() as connection:
+            for day in sorted(missing_days):
+                await connection.execute(text("SELECT ensure_processed_agent_data_partition(:day)"), {"day": day})
+        self.mark_created(missing_days)
+
+    async def apply_retention(self) -> int:
+        """Roll up and drop partitions that ended before the retention cutoff. Returns the number dropped."""
+        cutoff = utc_today() - timedelta(days=self.retention_days)
+        cutoff_timestamp = datetime.combine(cutoff, datetime.min.time())
+        dropped = 0
+        async with self.engine.connect() as connection:
+            partitions = (await connection.execute(text(LIST_PARTITIONS_QUERY))).scalars().all()
+        for partition_name in partitions:
+            day = partition_day(partition_name)
+            async with self.engine.begin() as connection:
+                if day is None:
+                    # Old rows that ended up in the default partition
+                    await connection.execute(text(ROLLUP_QUERY.format(table=DEFAULT_PARTITION)),
+                                             {"cutoff": cutoff_timestamp})
+                    await connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+                                             {"cutoff": cutoff_timestamp})
+                elif day < cutoff:
+                    await connection.execute(text(ROLLUP_QUERY.format(table=partition_name)),
+                                             {"cutoff": cutoff_timestamp})
+                    await connection.execute(
+                        text(f"ALTER TABLE processed_agent_data DETACH PARTITION {partition_name}")
+                    )
+                    await connection.execute(text(f"DROP TABLE {partition_name}"))
+                    self._known_days.discard(day)
+                    dropped += 1
+        return dropped
+
+    async def run_maintenance(self):
+        """Periodically pre-create upcoming partitions and apply the retention policy."""
+        while True:
+            try:
+                today = datetime.combine(utc_today(), datetime.min.time())
+                await self.ensure_partitions(today + timedelta(days=i) for i in range(self.precreate_days + 1))
+                dropped = await self.apply_retention()
+                if dropped:
+                    logging.info(f"Dropped {dropped} expired processed_agent_data partitions")
+            except Exception as e:
+                logging.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(self.maintenance_interval)
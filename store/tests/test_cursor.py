@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from main import cursor_condition, encode_cursor
+
+
+def encode(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def compile_condition(condition):
+    compiled = condition.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+def test_id_cursor_round_trip():
+    cursor = encode_cursor({"id": 42, "timestamp": datetime(2024, 3, 1, 12, 0)}, "id")
+    sql, params = compile_condition(cursor_condition(cursor, "id"))
+    assert sql == "processed_agent_data.id > %(id_1)s"
+    assert params == {"id_1": 42}
+
+
+def test_timestamp_cursor_round_trip():
+    timestamp = datetime(2024, 3, 1, 12, 0, 0, 250000)
+    cursor = encode_cursor({"id": 42, "timestamp": timestamp}, "timestamp")
+    sql, params = compile_condition(cursor_condition(cursor, "timestamp"))
+    assert sql == "(processed_agent_data.timestamp, processed_agent_data.id) > (%(param_1)s, %(param_2)s)"
+    assert params == {"param_1": timestamp, "param_2": 42}
+
+
+@pytest.mark.parametrize("cursor, order_by", [
+    ("not base64!", "id"),
+    (base64.urlsafe_b64encode(b"\xff\xfe").decode(), "id"),
+    (encode({"id": 1}), "id"),
+    (encode({"timestamp": "2024-03-01T12:00:00", "id": 1}), "timestamp"),
+    (encode("1"), "id"),
+    (encode([]), "id"),
+    (encode(["1"]), "id"),
+    (encode([1.5]), "id"),
+    (encode([True]), "id"),
+    (encode([2 ** 31]), "id"),
+    (encode([1]), "timestamp"),
+    (encode(["2024-03-01T12:00:00"]), "timestamp"),
+    (encode(["yesterday", 1]), "timestamp"),
+    (encode([1709294400, 1]), "timestamp"),
+    (encode(["2024-03-01T12:00:00", 1, 2]), "timestamp"),
+])
+def test_invalid_cursors_are_rejected(cursor, order_by):
+    with pytest.raises(HTTPException) as error:
+        cursor_condition(cursor, order_by)
+    assert error.value.status_code == 400
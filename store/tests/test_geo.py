@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from geo import (
+    GRID_CELL_SIZE,
+    GRID_COLUMNS,
+    bbox_around,
+    grid_cell,
+    grid_cell_ranges,
+    grid_cells_around,
+    grid_cells_near,
+    haversine_distance,
+)
+
+
+def sql_cell(latitude, longitude):
+    """GRID_CELL_SQL evaluated in Python, the formula of the generated cell_id columns."""
+    return (math.floor((latitude + 90) / GRID_CELL_SIZE) * GRID_COLUMNS
+            + min(math.floor((longitude + 180) / GRID_CELL_SIZE), GRID_COLUMNS - 1))
+
+
+@pytest.mark.parametrize("latitude, longitude", [
+    (50.450386085935094, 30.524547100067142),
+    (-33.8688, 151.2093),
+    (0.0, 0.0),
+    (-90.0, -180.0),
+    (90.0, 180.0),
+    (50.45, 30.52),
+])
+def test_grid_cell_matches_the_generated_column(latitude, longitude):
+    assert grid_cell(latitude, longitude) == sql_cell(latitude, longitude)
+
+
+def test_grid_cell_ids():
+    assert grid_cell(-90.0, -180.0) == 0
+    assert grid_cell(-90.0, -179.995) == 0
+    assert grid_cell(-90.0, -179.985) == 1
+    assert grid_cell(-89.985, -180.0) == GRID_COLUMNS
+    # The antimeridian belongs to the last column instead of starting a new row
+    assert grid_cell(0.005, 180.0) == grid_cell(0.005, 179.995)
+
+
+def test_grid_cell_ranges_cover_the_box():
+    ranges = grid_cell_ranges(50.001, 30.001, 50.025, 30.015, max_rows=10)
+    assert len(ranges) == 3
+    cells = {cell for first, last in ranges for cell in range(first, last + 1)}
+    for latitude in (50.001, 50.013, 50.025):
+        for longitude in (30.001, 30.015):
+            assert grid_cell(latitude, longitude) in cells
+
+
+def test_grid_cell_ranges_give_up_on_tall_boxes():
+    assert grid_cell_ranges(40.0, 30.0, 60.0, 31.0, max_rows=10) is None
+
+
+def test_grid_cells_around_include_the_neighbours_near_a_border():
+    cell = grid_cell(50.0001, 30.005)
+    cells = grid_cells_around(50.0001, 30.005, 50.0)
+    assert cell in cells
+    assert cell - GRID_COLUMNS in cells
+    assert grid_cells_around(50.005, 30.005, 10.0) == [grid_cell(50.005, 30.005)]
+
+
+def test_grid_cells_near_cover_cells_around_every_point_of_the_cell():
+    cell = grid_cell(50.455, 30.525)
+    near = set(grid_cells_near(cell, 10.0))
+    assert len(near) == 9
+    for latitude in (50.45, 50.455, 50.4599):
+        for longitude in (30.52, 30.525, 30.5299):
+            assert set(grid_cells_around(latitude, longitude, 10.0)) <= near
+
+
+def test_bbox_around_reaches_the_radius():
+    min_latitude, min_longitude, max_latitude, max_longitude = bbox_around(50.45, 30.52, 100.0)
+    assert haversine_distance(50.45, 30.52, max_latitude, 30.52) == pytest.approx(100.0, rel=1e-6)
+    assert haversine_distance(50.45, 30.52, 50.45, min_longitude) == pytest.approx(100.0, rel=1e-6)
+    assert min_latitude < 50.45 < max_latitude and min_longitude < 30.52 < max_longitude
+
+
+def test_haversine_distance():
+    assert haversine_distance(50.45, 30.52, 50.45, 30.52) == 0.0
+    # One degree of latitude is about 111 km
+    assert haversine_distance(50.0, 30.0, 51.0, 30.0) == pytest.approx(111195, rel=1e-3)